@@ -0,0 +1,37 @@
+"""
+Unique scan_id index and partial active-status index on scan_results.
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic
+revision = '002_scan_results_lookup_indexes'
+down_revision = '001_initial'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_scan_results_scan_id
+            ON scan_results (scan_id)
+        """)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_scan_results_active_status
+            ON scan_results (status)
+            WHERE status IN ('pending', 'in_progress')
+        """)
+    
+    # The named index enforces uniqueness now, so the constraint's own
+    # index is redundant
+    op.drop_constraint('scan_results_scan_id_key', 'scan_results', type_='unique')
+
+
+def downgrade():
+    op.create_unique_constraint('scan_results_scan_id_key', 'scan_results', ['scan_id'])
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_scan_results_active_status")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_scan_results_scan_id")
@@ -0,0 +1,36 @@
+"""
+Index the foreign keys that no existing index leads with.
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic
+revision = '003_foreign_key_indexes'
+down_revision = '002_scan_results_lookup_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_controls_framework_id_category
+            ON controls (framework_id, category)
+        """)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vulnerabilities_framework_id
+            ON vulnerabilities (framework_id)
+        """)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vulnerability_control_mappings_control_id
+            ON vulnerability_control_mappings (control_id)
+        """)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_vulnerability_control_mappings_control_id")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_vulnerabilities_framework_id")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_controls_framework_id_category")
@@ -0,0 +1,40 @@
+"""
+Normalized scan_findings table for matched SAST findings.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic
+revision = '004_scan_findings'
+down_revision = '003_foreign_key_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'scan_findings',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('scan_id', sa.String(50), nullable=False),
+        sa.Column('tool', sa.String(20), nullable=False),
+        sa.Column('finding', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('matches', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('controls', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('vulnerability_ids', postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.Column('control_ids', postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    
+    # The table is new and empty, so the indexes need no CONCURRENTLY
+    op.execute("""
+        CREATE INDEX ix_scan_findings_scan_id ON scan_findings (scan_id);
+        CREATE INDEX ix_scan_findings_vulnerability_ids ON scan_findings USING gin (vulnerability_ids);
+        CREATE INDEX ix_scan_findings_control_ids ON scan_findings USING gin (control_ids);
+    """)
+
+
+def downgrade():
+    op.drop_table('scan_findings')
@@ -0,0 +1,59 @@
+"""
+Store JSON payloads as JSONB and GIN-index the searchable ones.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic
+revision = '005_jsonb_columns'
+down_revision = '004_scan_findings'
+branch_labels = None
+depends_on = None
+
+JSON_COLUMNS = (
+    ('vulnerabilities', 'affected_products'),
+    ('vulnerabilities', 'references'),
+    ('vulnerabilities', 'metadata'),
+    ('compliance_requirements', 'validation_criteria'),
+    ('scan_results', 'findings'),
+    ('scan_results', 'raw_output'),
+)
+
+
+def upgrade():
+    # Rewrites each table under an exclusive lock, once
+    for table, column in JSON_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=postgresql.JSONB(astext_type=sa.Text()),
+            postgresql_using=f'"{column}"::jsonb'
+        )
+    
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_scan_results_findings_gin
+            ON scan_results USING gin (findings)
+        """)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vulnerabilities_affected_products_gin
+            ON vulnerabilities USING gin (affected_products)
+        """)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_vulnerabilities_affected_products_gin")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_scan_results_findings_gin")
+    
+    for table, column in JSON_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=postgresql.JSON(astext_type=sa.Text()),
+            postgresql_using=f'"{column}"::json'
+        )
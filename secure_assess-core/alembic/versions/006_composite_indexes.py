@@ -0,0 +1,31 @@
+"""
+Composite indexes for per-framework scan history and mapping lookups.
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic
+revision = '006_composite_indexes'
+down_revision = '005_jsonb_columns'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vcm_vulnerability_id
+            ON vulnerability_control_mappings (vulnerability_id, control_id)
+        """)
+        op.execute("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_scan_results_framework_scandate
+            ON scan_results (framework_id, scan_date DESC)
+        """)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_scan_results_framework_scandate")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_vcm_vulnerability_id")
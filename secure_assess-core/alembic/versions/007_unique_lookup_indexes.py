@@ -0,0 +1,57 @@
+"""
+Unique indexes the seed upserts infer their ON CONFLICT targets from.
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic
+revision = '007_unique_lookup_indexes'
+down_revision = '006_composite_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Earlier seed runs inserted controls and requirements again on every
+    # run; keep the first copy of each, repointing mappings at it
+    op.execute("""
+        UPDATE vulnerability_control_mappings m
+        SET control_id = d.keep_id
+        FROM (
+            SELECT id, min(id) OVER (PARTITION BY framework_id, control_id) AS keep_id
+            FROM controls
+        ) d
+        WHERE m.control_id = d.id AND d.id <> d.keep_id
+    """)
+    op.execute("""
+        DELETE FROM controls c
+        USING controls k
+        WHERE c.framework_id = k.framework_id
+          AND c.control_id = k.control_id
+          AND c.id > k.id
+    """)
+    op.execute("""
+        DELETE FROM compliance_requirements r
+        USING compliance_requirements k
+        WHERE r.framework_id = k.framework_id
+          AND r.requirement_id = k.requirement_id
+          AND r.id > k.id
+    """)
+    
+    # CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        op.execute("""
+            CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_controls_framework_id_control_id
+            ON controls (framework_id, control_id)
+        """)
+        op.execute("""
+            CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_compliance_requirements_framework_id_requirement_id
+            ON compliance_requirements (framework_id, requirement_id)
+        """)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_compliance_requirements_framework_id_requirement_id")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_controls_framework_id_control_id")
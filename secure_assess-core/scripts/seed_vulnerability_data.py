@@ -7,7 +7,8 @@ from datetime import datetime, timedelta
 import logging
 import os
 import sys
-from sqlalchemy import select
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from dotenv import load_dotenv
 
@@ -31,103 +32,100 @@ database_url = database_url.replace("postgresql://", "postgresql+asyncpg://")
 engine = create_async_engine(database_url)
 AsyncSessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+# One row per framework: (name, version, description, control category, controls source)
+SEED = (
+    ("NIST", "1.0", "National Institute of Standards and Technology Vulnerability Database", None, None),
+    ("OWASP", "2021", "OWASP Top 10 Web Application Security Risks", "OWASP Top 10 2021", OWASPDataFetcher.get_owasp_controls),
+    ("CIS", "8.0", "Center for Internet Security Controls", "CIS Controls v8", CISDataFetcher.get_cis_controls),
+)
+
 async def seed_frameworks(session: AsyncSession) -> dict:
-    """Seed security frameworks."""
+    """Seed security frameworks and return their ids keyed by name."""
     frameworks_data = [
-        Framework(
-            name="NIST",
-            version="1.0",
-            description="National Institute of Standards and Technology Vulnerability Database"
-        ),
-        Framework(
-            name="OWASP",
-            version="2021",
-            description="OWASP Top 10 Web Application Security Risks"
-        ),
-        Framework(
-            name="CIS",
-            version="8.0",
-            description="Center for Internet Security Controls"
-        )
+        {'name': name, 'version': version, 'description': description}
+        for name, version, description, _, _ in SEED
     ]
     
-    # Check for existing frameworks
+    # Insert missing frameworks and get every id back in one statement; the
+    # no-op update makes RETURNING include rows that already existed
+    stmt = insert(Framework.__table__).values(frameworks_data)
     result = await session.execute(
-        select(Framework).where(Framework.name.in_([f.name for f in frameworks_data]))
+        stmt.on_conflict_do_update(
+            index_elements=['name'],
+            set_={'name': stmt.excluded.name}
+        ).returning(Framework.__table__.c.id, Framework.__table__.c.name)
     )
-    existing_frameworks = {f.name: f for f in result.scalars()}
+    return {name: framework_id for framework_id, name in result}
+
+CONTROL_COLUMNS = ('framework_id', 'control_id', 'title', 'description', 'category', 'severity')
+REQUIREMENT_COLUMNS = ('framework_id', 'requirement_id', 'title', 'description', 'category', 'priority')
+
+async def copy_upsert(session: AsyncSession, table: str, columns: tuple, records: list, key: tuple) -> int:
+    """Bulk load records with COPY and merge them into table, skipping existing keys.
     
-    framework_dict = {}
+    Args:
+        session: Session whose transaction the load runs in
+        table: Target table name
+        columns: Column names matching each record tuple
+        records: Row tuples to load
+        key: Unique columns used for conflict detection
     
-    # Add new frameworks
-    for framework in frameworks_data:
-        if framework.name not in existing_frameworks:
-            session.add(framework)
-            await session.flush()
-            await session.refresh(framework)
-            framework_dict[framework.name] = framework
-        else:
-            framework_dict[framework.name] = existing_frameworks[framework.name]
+    Returns:
+        Number of rows inserted
+    """
+    if not records:
+        return 0
     
-    return framework_dict
-
-async def seed_owasp_controls(session: AsyncSession, framework_id: int):
-    """Seed OWASP controls and requirements."""
-    owasp_data = OWASPDataFetcher.get_owasp_controls()
+    connection = await session.connection()
+    raw_conn = (await connection.get_raw_connection()).driver_connection
+    staging = f"{table}_load"
+    column_list = ", ".join(columns)
     
-    for control_id, data in owasp_data.items():
-        control = Control(
-            framework_id=framework_id,
-            control_id=control_id,
-            title=data['title'],
-            description=data['description'],
-            category='OWASP Top 10 2021',
-            severity='High'
-        )
-        session.add(control)
-        await session.flush()
-        
-        # Add compliance requirements
-        for idx, requirement in enumerate(data['controls'], 1):
-            req = ComplianceRequirement(
-                framework_id=framework_id,
-                requirement_id=f"{control_id}.{idx}",
-                title=requirement,
-                description=requirement,
-                category=data['title'],
-                priority='Must'
-            )
-            session.add(req)
-            await session.flush()
+    # COPY cannot do ON CONFLICT, so stream into a temp table and merge from there
+    await raw_conn.execute(
+        f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS "
+        f"SELECT {column_list} FROM {table} WITH NO DATA"
+    )
+    await raw_conn.copy_records_to_table(staging, records=records, columns=columns)
+    status = await raw_conn.execute(
+        f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {staging} "
+        f"ON CONFLICT ({', '.join(key)}) DO NOTHING"
+    )
+    # Command tag of the form "INSERT 0 <rows>"
+    return int(status.split()[-1])
 
-async def seed_cis_controls(session: AsyncSession, framework_id: int):
-    """Seed CIS controls and requirements."""
-    cis_data = CISDataFetcher.get_cis_controls()
+async def seed_controls(session: AsyncSession, frameworks: dict):
+    """Seed controls and requirements for every framework in SEED."""
+    controls = []
+    requirements = []
+    for name, _, _, category, get_controls in SEED:
+        if get_controls is None:
+            continue
+        framework_id = frameworks[name]
+        for control_id, data in get_controls().items():
+            controls.append(
+                (framework_id, control_id, data['title'], data['description'], category, 'High')
+            )
+            requirements.extend(
+                (framework_id, f"{control_id}.{idx}", requirement, requirement, data['title'], 'Must')
+                for idx, requirement in enumerate(data['controls'], 1)
+            )
     
-    for control_id, data in cis_data.items():
-        control = Control(
-            framework_id=framework_id,
-            control_id=control_id,
-            title=data['title'],
-            description=data['description'],
-            category='CIS Controls v8',
-            severity='High'
+    inserted = await copy_upsert(
+        session, Control.__tablename__, CONTROL_COLUMNS, controls, ('framework_id', 'control_id')
+    )
+    if inserted:
+        # Raw COPY bypasses the ORM hook that versions frameworks on control
+        # changes; move last_updated so cached scanner rules are rebuilt
+        await session.execute(
+            update(Framework)
+            .where(Framework.id.in_({control[0] for control in controls}))
+            .values(last_updated=datetime.utcnow())
         )
-        session.add(control)
-        await session.flush()
-        
-        # Add compliance requirements
-        for idx, requirement in enumerate(data['controls'], 1):
-            req = ComplianceRequirement(
-                framework_id=framework_id,
-                requirement_id=f"{control_id}.{idx}",
-                title=requirement,
-                description=requirement,
-                category=data['title'],
-                priority='Must'
-            )
-            session.add(req)
-            await session.flush()
+    await copy_upsert(
+        session, ComplianceRequirement.__tablename__, REQUIREMENT_COLUMNS, requirements,
+        ('framework_id', 'requirement_id')
+    )
 
 async def seed_recent_cves(session: AsyncSession, framework_id: int):
     """Seed recent CVEs from NVD."""
@@ -137,23 +135,32 @@ async def seed_recent_cves(session: AsyncSession, framework_id: int):
     start_date = datetime.utcnow() - timedelta(days=30)
     cves = await fetcher.fetch_nvd_cves(start_date=start_date)
     
-    for cve_data in cves:
-        vuln = Vulnerability(
-            framework_id=framework_id,
-            cve_id=cve_data['cve_id'],
-            title=cve_data['title'],
-            description=cve_data['description'],
-            severity=cve_data['severity'],
-            cvss_score=cve_data['cvss_score'],
-            cvss_vector=cve_data['cvss_vector'],
-            published_date=datetime.fromisoformat(cve_data['published_date'].replace('Z', '+00:00')),
-            last_modified_date=datetime.fromisoformat(cve_data['last_modified_date'].replace('Z', '+00:00')),
-            affected_products=cve_data['affected_products'],
-            references=cve_data['references'],
-            extra_data=cve_data['metadata']
-        )
-        session.add(vuln)
-        await session.flush()
+    if not cves:
+        return
+    
+    vulnerabilities = [
+        {
+            'framework_id': framework_id,
+            'cve_id': cve_data['cve_id'],
+            'title': cve_data['title'],
+            'description': cve_data['description'],
+            'severity': cve_data['severity'],
+            'cvss_score': cve_data['cvss_score'],
+            'cvss_vector': cve_data['cvss_vector'],
+            'published_date': datetime.fromisoformat(cve_data['published_date'].replace('Z', '+00:00')),
+            'last_modified_date': datetime.fromisoformat(cve_data['last_modified_date'].replace('Z', '+00:00')),
+            'affected_products': cve_data['affected_products'],
+            'references': cve_data['references'],
+            'extra_data': cve_data['metadata']
+        }
+        for cve_data in cves
+    ]
+    
+    # Single executemany INSERT instead of one ORM add/flush per CVE
+    await session.execute(
+        insert(Vulnerability.__table__).on_conflict_do_nothing(index_elements=['cve_id']),
+        vulnerabilities
+    )
 
 async def main():
     """Main seeding function."""
@@ -166,16 +173,12 @@ async def main():
                 frameworks = await seed_frameworks(session)
                 logger.info("Frameworks seeded successfully")
                 
-                # Seed OWASP controls
-                await seed_owasp_controls(session, frameworks['OWASP'].id)
-                logger.info("OWASP controls seeded successfully")
-                
-                # Seed CIS controls
-                await seed_cis_controls(session, frameworks['CIS'].id)
-                logger.info("CIS controls seeded successfully")
+                # Seed OWASP and CIS controls
+                await seed_controls(session, frameworks)
+                logger.info("Framework controls seeded successfully")
                 
                 # Seed recent CVEs
-                await seed_recent_cves(session, frameworks['NIST'].id)
+                await seed_recent_cves(session, frameworks['NIST'])
                 logger.info("Recent CVEs seeded successfully")
                 
                 logger.info("Database seeding completed successfully")
@@ -1,31 +1,83 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Any
+from weakref import WeakValueDictionary
+import asyncio
+import orjson
+from redis.exceptions import RedisError
 
-from src.db.session import get_db
+from src.config import settings
+from src.core.logging import get_logger
+from src.db.redis.client import get_async_redis, rules_key
+from src.db.session import get_async_db
 from src.services.scanning.rules_manager import RulesManager
 
+logger = get_logger(__name__)
+
 router = APIRouter()
 
+# One rebuild per framework at a time; concurrent callers wait for it and
+# then find the result in the RulesManager cache. Only the callers holding
+# or awaiting a lock keep it alive, so entries, including those for ids
+# that match no framework, go away with the last of them
+_generate_locks: "WeakValueDictionary[int, asyncio.Lock]" = WeakValueDictionary()
+
+async def _publish_rules(framework_id: int, rules: Dict[str, Any]) -> None:
+    """Store generated rules in Redis; a Redis outage only costs the cache"""
+    try:
+        await get_async_redis().set(
+            rules_key(framework_id),
+            orjson.dumps(rules),
+            ex=settings.redis_cache_ttl
+        )
+    except RedisError as e:
+        logger.warning(f"Could not cache rules for framework {framework_id}: {str(e)}")
+
+async def _generate_rules(framework_id: int, db: AsyncSession) -> Dict[str, Any]:
+    """Build a framework's rules and publish them to Redis"""
+    lock = _generate_locks.get(framework_id)
+    if lock is None:
+        lock = _generate_locks[framework_id] = asyncio.Lock()
+    async with lock:
+        rules = await RulesManager(db).get_framework_rules_async(framework_id)
+        await _publish_rules(framework_id, rules)
+    return rules
+
+async def _load_rules(framework_id: int, db: AsyncSession) -> Dict[str, Any]:
+    """Read rules warmed by the workers, generating them on a miss or once stale"""
+    cached = None
+    try:
+        cached = await get_async_redis().get(rules_key(framework_id))
+    except RedisError as e:
+        logger.warning(f"Rules cache unavailable: {str(e)}")
+    
+    if cached is not None:
+        rules = orjson.loads(cached)
+        # The key outlives edits to the framework, so published rules are
+        # only served while they carry its current version
+        if rules.get("version") == await RulesManager(db).get_rules_version_async(framework_id):
+            return rules
+    
+    return await _generate_rules(framework_id, db)
+
 @router.get("/frameworks")
-async def list_frameworks(db: Session = Depends(get_db)):
+async def list_frameworks(db: AsyncSession = Depends(get_async_db)):
     """
     List all available compliance frameworks and their rules status
     """
     rules_manager = RulesManager(db)
-    return rules_manager.get_available_frameworks()
+    return await rules_manager.get_available_frameworks_async()
 
 @router.post("/frameworks/{framework_id}/rules/generate")
 async def generate_framework_rules(
     framework_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Generate scanner rules for a specific framework
     """
     try:
-        rules_manager = RulesManager(db)
-        rules = rules_manager.get_framework_rules(framework_id)
+        rules = await _generate_rules(framework_id, db)
         return {
             "status": "success",
             "message": f"Rules generated for framework {rules['framework_name']}",
@@ -43,14 +95,13 @@ async def generate_framework_rules(
 @router.get("/frameworks/{framework_id}/rules")
 async def get_framework_rules(
     framework_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get the current rules for a framework
     """
     try:
-        rules_manager = RulesManager(db)
-        return rules_manager.get_framework_rules(framework_id)
+        return await _load_rules(framework_id, db)
     except Exception as e:
         raise HTTPException(
             status_code=404,
@@ -62,14 +113,13 @@ async def preview_scan_rules(
     framework_id: int,
     repository_url: str,
     branch: str = "main",
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Preview which rules would apply to a repository without running a full scan
     """
     try:
-        rules_manager = RulesManager(db)
-        rules = rules_manager.get_framework_rules(framework_id)
+        rules = await _load_rules(framework_id, db)
         
         # Extract rule summaries
         bandit_rules = [
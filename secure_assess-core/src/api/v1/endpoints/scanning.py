@@ -1,11 +1,16 @@
+import asyncio
+
 from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
+from fastapi.responses import ORJSONResponse
 from typing import Optional, List
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db.session import get_db
+from src.db.session import get_async_db
 from src.services.scanning.orchestrator import ScanOrchestrator
+from src.services.scanning.raw_output_store import load_raw_outputs
 from src.services.scanning.upload_handler import CodeUploadHandler
-from src.db.postgres.models import ScanResults
+from src.db.postgres.models import ScanResult
 
 router = APIRouter()
 
@@ -15,7 +20,7 @@ async def scan_git_repository(
     branch: str = "main",
     framework_id: int = 1,  # Default to first framework
     scan_types: List[str] = ["sast"],  # Default to SAST only
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Initiate a security scan for a Git repository
@@ -46,8 +51,7 @@ async def scan_git_repository(
 async def scan_uploaded_code(
     file: UploadFile = File(...),
     framework_id: int = Form(1),  # Default to first framework
-    scan_name: Optional[str] = Form(None),
-    db: Session = Depends(get_db)
+    scan_name: Optional[str] = Form(None)
 ):
     """
     Scan uploaded code files (ZIP or TAR archives)
@@ -62,10 +66,10 @@ async def scan_uploaded_code(
     finally:
         handler.cleanup()
 
-@router.get("/scan/{scan_id}")
+@router.get("/scan/{scan_id}", response_class=ORJSONResponse)
 async def get_scan_status(
     scan_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get the status and results of a scan
@@ -80,17 +84,30 @@ async def get_scan_status(
             detail=f"Scan not found: {str(e)}"
         )
 
-@router.get("/scan/{scan_id}/results")
+@router.get("/scan/{scan_id}/results", response_class=ORJSONResponse)
 async def get_scan_results(
     scan_id: str,
-    db: Session = Depends(get_db)
+    include_raw: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Get detailed results of a completed scan
+    Get detailed results of a completed scan, with the scanners' raw
+    reports if include_raw is set
     """
-    scan_result = db.query(ScanResults).filter(
-        ScanResults.scan_id == scan_id
-    ).first()
+    # Project only the response columns; the raw_output pointers only when
+    # the reports are asked for
+    columns = [
+        ScanResult.status,
+        ScanResult.findings,
+        ScanResult.compliance_score,
+        ScanResult.scan_date,
+        ScanResult.repository_url,
+        ScanResult.branch
+    ]
+    if include_raw:
+        columns.append(ScanResult.raw_output)
+    result = await db.execute(select(*columns).where(ScanResult.scan_id == scan_id))
+    scan_result = result.first()
     
     if not scan_result:
         raise HTTPException(
@@ -104,11 +121,19 @@ async def get_scan_results(
             detail=f"Scan is not complete. Current status: {scan_result.status}"
         )
     
-    return {
+    findings = scan_result.findings
+    await ScanOrchestrator(db).attach_mapped_findings(scan_id, findings)
+    
+    response = {
         "scan_id": scan_id,
-        "findings": scan_result.findings,
+        "findings": findings,
         "compliance_score": scan_result.compliance_score,
         "scan_date": scan_result.scan_date,
         "repository_url": scan_result.repository_url,
         "branch": scan_result.branch
-    }
\ No newline at end of file
+    }
+    if include_raw:
+        # Reports are read from RAW_OUTPUT_DIR and decompressed off the
+        # event loop
+        response["raw_output"] = await asyncio.to_thread(load_raw_outputs, scan_result.raw_output)
+    return response
\ No newline at end of file
@@ -3,11 +3,19 @@ Application configuration management using Pydantic Settings.
 Loads configuration from environment variables with validation.
 """
 
+from functools import lru_cache
 from typing import List, Optional
-from pydantic import Field, validator
+from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+def _csv(v):
+    """Split a comma-separated string into stripped items; lists pass through."""
+    if isinstance(v, str):
+        return [item.strip() for item in v.split(",")]
+    return v
+
+
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
     
@@ -51,12 +59,31 @@ class Settings(BaseSettings):
     workspace_ttl_minutes: int = Field(default=30, alias="WORKSPACE_TTL_MINUTES")
     max_workspace_size_gb: int = Field(default=2, alias="MAX_WORKSPACE_SIZE_GB")
     workspace_cleanup_interval_minutes: int = Field(default=5, alias="WORKSPACE_CLEANUP_INTERVAL_MINUTES")
+    repo_cache_dir: str = Field(default="~/.cache/secure_assess/repos", alias="REPO_CACHE_DIR")
     
     # Scanning Configuration
     max_concurrent_scans: int = Field(default=10, alias="MAX_CONCURRENT_SCANS")
     scan_timeout_minutes: int = Field(default=60, alias="SCAN_TIMEOUT_MINUTES")
     enable_incremental_scan: bool = Field(default=True, alias="ENABLE_INCREMENTAL_SCAN")
     full_scan_file_threshold: int = Field(default=100, alias="FULL_SCAN_FILE_THRESHOLD")
+    semgrep_jobs: Optional[int] = Field(default=None, alias="SEMGREP_JOBS")
+    # Processes a single Bandit scan may shard across. Scan workers already
+    # run many scans at once, and prefork children are daemonic and cannot
+    # start pools of their own, so only raise it where Bandit runs alone
+    bandit_workers: int = Field(default=1, alias="BANDIT_WORKERS")
+    semgrep_max_memory_mb: int = Field(default=2048, alias="SEMGREP_MAX_MEMORY_MB")
+    semgrep_exclude: List[str] = Field(
+        default=["node_modules", "vendor", "dist", "*.min.js", "test/fixtures"],
+        alias="SEMGREP_EXCLUDE"
+    )
+    semgrep_cache_path: str = Field(default="~/.cache/secure_assess/semgrep_cache.db", alias="SEMGREP_CACHE_PATH")
+    semgrep_rules_dir: str = Field(default="~/.cache/secure_assess/rules", alias="SEMGREP_RULES_DIR")
+    rules_version_ttl_seconds: int = Field(default=300, alias="RULES_VERSION_TTL_SECONDS")
+    # Scan workers write raw reports here and the API reads them back, so
+    # outside a single-host setup it must be storage both have mounted
+    raw_output_dir: str = Field(default="~/.local/share/secure_assess/raw_output", alias="RAW_OUTPUT_DIR")
+    raw_output_retention_days: int = Field(default=30, alias="RAW_OUTPUT_RETENTION_DAYS")
+    raw_output_purge_interval_minutes: int = Field(default=60, alias="RAW_OUTPUT_PURGE_INTERVAL_MINUTES")
     
     # SCM Integrations
     github_client_id: Optional[str] = Field(default=None, alias="GITHUB_CLIENT_ID")
@@ -73,6 +100,8 @@ class Settings(BaseSettings):
     # Celery
     celery_broker_url: str = Field(..., alias="CELERY_BROKER_URL")
     celery_result_backend: str = Field(..., alias="CELERY_RESULT_BACKEND")
+    celery_pool: Optional[str] = Field(default=None, alias="CELERY_POOL")
+    celery_concurrency: Optional[int] = Field(default=None, alias="CELERY_CONCURRENCY")
     
     # CORS
     cors_origins: List[str] = Field(default=["http://localhost:3000"], alias="CORS_ORIGINS")
@@ -104,46 +133,22 @@ class Settings(BaseSettings):
         extra="ignore"
     )
     
-    @validator("cors_origins", pre=True)
-    def parse_cors_origins(cls, v):
-        """Parse comma-separated CORS origins string into list."""
-        if isinstance(v, str):
-            return [origin.strip() for origin in v.split(",")]
-        return v
-    
-    @validator("cors_methods", pre=True)
-    def parse_cors_methods(cls, v):
-        """Parse comma-separated CORS methods string into list."""
-        if isinstance(v, str):
-            if v == "*":
-                return ["*"]
-            return [method.strip() for method in v.split(",")]
-        return v
-    
-    @validator("cors_headers", pre=True)
-    def parse_cors_headers(cls, v):
-        """Parse comma-separated CORS headers string into list."""
-        if isinstance(v, str):
-            if v == "*":
-                return ["*"]
-            return [header.strip() for header in v.split(",")]
-        return v
-    
-    @validator("allowed_file_extensions", pre=True)
-    def parse_file_extensions(cls, v):
-        """Parse comma-separated file extensions string into list."""
-        if isinstance(v, str):
-            return [ext.strip() for ext in v.split(",")]
-        return v
-    
-    @validator("default_compliance_frameworks", pre=True)
-    def parse_compliance_frameworks(cls, v):
-        """Parse comma-separated compliance frameworks string into list."""
-        if isinstance(v, str):
-            return [framework.strip() for framework in v.split(",")]
-        return v
+    @field_validator(
+        "cors_origins",
+        "cors_methods",
+        "cors_headers",
+        "allowed_file_extensions",
+        "default_compliance_frameworks",
+        "semgrep_exclude",
+        mode="before"
+    )
+    @classmethod
+    def parse_csv_lists(cls, v):
+        """Parse comma-separated list settings into lists."""
+        return _csv(v)
     
-    @validator("secret_key")
+    @field_validator("secret_key")
+    @classmethod
     def validate_secret_key(cls, v):
         """Ensure secret key is strong enough."""
         if len(v) < 32:
@@ -164,7 +169,28 @@ class Settings(BaseSettings):
     def database_url_async(self) -> str:
         """Get async database URL for SQLAlchemy."""
         return self.database_url.replace("postgresql://", "postgresql+asyncpg://")
+    
+    @property
+    def task_time_limit_seconds(self) -> int:
+        """Hard time limit of a scan task, after which Celery kills its worker process."""
+        return self.scan_timeout_minutes * 60
+    
+    @property
+    def task_soft_time_limit_seconds(self) -> int:
+        """Soft time limit of a scan task, raising SoftTimeLimitExceeded in it."""
+        return self.task_time_limit_seconds - min(300, self.task_time_limit_seconds // 10)
+    
+    @property
+    def scanner_timeout_seconds(self) -> int:
+        """Longest a scanner subprocess may run, ending before the soft time limit."""
+        return self.task_soft_time_limit_seconds - min(120, self.task_soft_time_limit_seconds // 10)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings instance."""
+    return Settings()
 
 
 # Global settings instance
-settings = Settings()
\ No newline at end of file
+settings = get_settings()
\ No newline at end of file
@@ -3,8 +3,9 @@ Database models for vulnerability and compliance data.
 """
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, JSON, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, Enum, Index, event, inspect, text, update
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.orm import Session, relationship
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -18,7 +19,7 @@ class Framework(Base):
     name = Column(String(50), unique=True, nullable=False)
     version = Column(String(20), nullable=False)
     description = Column(Text)
-    last_updated = Column(DateTime, default=datetime.utcnow)
+    last_updated = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     vulnerabilities = relationship('Vulnerability', back_populates='framework')
     controls = relationship('Control', back_populates='framework')
@@ -27,6 +28,10 @@ class Framework(Base):
 class Control(Base):
     """Security controls defined by frameworks."""
     __tablename__ = 'controls'
+    __table_args__ = (
+        Index('ix_controls_framework_id_control_id', 'framework_id', 'control_id', unique=True),
+        Index('ix_controls_framework_id_category', 'framework_id', 'category'),
+    )
 
     id = Column(Integer, primary_key=True)
     framework_id = Column(Integer, ForeignKey('frameworks.id'), nullable=False)
@@ -44,9 +49,12 @@ class Control(Base):
 class Vulnerability(Base):
     """CVE and other vulnerability records."""
     __tablename__ = 'vulnerabilities'
+    __table_args__ = (
+        Index('ix_vulnerabilities_affected_products_gin', 'affected_products', postgresql_using='gin'),
+    )
 
     id = Column(Integer, primary_key=True)
-    framework_id = Column(Integer, ForeignKey('frameworks.id'), nullable=False)
+    framework_id = Column(Integer, ForeignKey('frameworks.id'), nullable=False, index=True)
     cve_id = Column(String(20), unique=True)  # CVE-YYYY-NNNNN
     title = Column(Text)  # Changed from String(200) to Text for longer titles
     description = Column(Text)
@@ -55,10 +63,10 @@ class Vulnerability(Base):
     cvss_vector = Column(String(100))
     published_date = Column(DateTime)
     last_modified_date = Column(DateTime)
-    affected_products = Column(JSON)  # List of affected products/versions
-    references = Column(JSON)  # List of reference URLs
+    affected_products = Column(JSONB)  # List of affected products/versions
+    references = Column(JSONB)  # List of reference URLs
     mitigation = Column(Text)
-    extra_data = Column(JSON)  # Additional framework-specific metadata
+    extra_data = Column(JSONB)  # Additional framework-specific metadata
     
     framework = relationship('Framework', back_populates='vulnerabilities')
     control_mappings = relationship('VulnerabilityControlMapping', back_populates='vulnerability')
@@ -67,10 +75,14 @@ class Vulnerability(Base):
 class VulnerabilityControlMapping(Base):
     """Maps vulnerabilities to framework controls."""
     __tablename__ = 'vulnerability_control_mappings'
+    __table_args__ = (
+        # Vulnerability -> controls lookups
+        Index('ix_vcm_vulnerability_id', 'vulnerability_id', 'control_id'),
+    )
 
     id = Column(Integer, primary_key=True)
     vulnerability_id = Column(Integer, ForeignKey('vulnerabilities.id'), nullable=False)
-    control_id = Column(Integer, ForeignKey('controls.id'), nullable=False)
+    control_id = Column(Integer, ForeignKey('controls.id'), nullable=False, index=True)
     mapping_type = Column(String(50))  # direct, indirect, etc.
     confidence = Column(Float)  # confidence score of the mapping
     notes = Column(Text)
@@ -82,6 +94,9 @@ class VulnerabilityControlMapping(Base):
 class ComplianceRequirement(Base):
     """Framework-specific compliance requirements."""
     __tablename__ = 'compliance_requirements'
+    __table_args__ = (
+        Index('ix_compliance_requirements_framework_id_requirement_id', 'framework_id', 'requirement_id', unique=True),
+    )
 
     id = Column(Integer, primary_key=True)
     framework_id = Column(Integer, ForeignKey('frameworks.id'), nullable=False)
@@ -90,7 +105,7 @@ class ComplianceRequirement(Base):
     description = Column(Text)
     category = Column(String(100))
     priority = Column(String(20))  # Must, Should, Optional
-    validation_criteria = Column(JSON)
+    validation_criteria = Column(JSONB)
     implementation_guidance = Column(Text)
     
     framework = relationship('Framework')
@@ -99,17 +114,72 @@ class ComplianceRequirement(Base):
 class ScanResult(Base):
     """Results from vulnerability scans."""
     __tablename__ = 'scan_results'
+    __table_args__ = (
+        # Every scan is looked up by scan_id. No INCLUDE columns: the status
+        # and results queries read findings, so they visit the heap anyway
+        Index('ix_scan_results_scan_id', 'scan_id', unique=True),
+        Index(
+            'ix_scan_results_active_status',
+            'status',
+            postgresql_where=text("status IN ('pending', 'in_progress')")
+        ),
+        Index('ix_scan_results_findings_gin', 'findings', postgresql_using='gin'),
+        # Per-framework scan history, newest first
+        Index('ix_scan_results_framework_scandate', 'framework_id', text('scan_date DESC')),
+    )
 
     id = Column(Integer, primary_key=True)
-    scan_id = Column(String(50), unique=True, nullable=False)
+    scan_id = Column(String(50), nullable=False)
     framework_id = Column(Integer, ForeignKey('frameworks.id'), nullable=False)
     repository_url = Column(String(200))
     branch = Column(String(100))
     commit_hash = Column(String(40))
     scan_date = Column(DateTime, default=datetime.utcnow)
     status = Column(String(20))  # completed, failed, in-progress
-    findings = Column(JSON)
+    findings = Column(JSONB)
     compliance_score = Column(Float)
-    raw_output = Column(JSON)
+    raw_output = Column(JSONB)
     
     framework = relationship('Framework')
+
+
+class ScanFinding(Base):
+    """A scanner finding matched to known vulnerabilities, with the controls they map to."""
+    __tablename__ = 'scan_findings'
+    __table_args__ = (
+        # Containment lookups such as "every finding matching vulnerability X"
+        Index('ix_scan_findings_vulnerability_ids', 'vulnerability_ids', postgresql_using='gin'),
+        Index('ix_scan_findings_control_ids', 'control_ids', postgresql_using='gin'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    scan_id = Column(String(50), nullable=False, index=True)
+    tool = Column(String(20), nullable=False)  # bandit, semgrep
+    finding = Column(JSONB)  # the finding as reported by the scanner
+    matches = Column(JSONB)  # matched vulnerabilities with confidence scores
+    controls = Column(JSONB)  # controls of the matched vulnerabilities
+    vulnerability_ids = Column(ARRAY(Integer), nullable=False)
+    control_ids = Column(ARRAY(Integer), nullable=False)
+
+
+@event.listens_for(Session, "after_flush")
+def _touch_frameworks(session, flush_context):
+    """
+    Move Framework.last_updated whenever a flush changes one of its controls.
+    
+    Generated scanner rules are cached per framework version, so control
+    edits have to change the version for the rules to be rebuilt.
+    """
+    framework_ids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Control) and (obj not in session.dirty or session.is_modified(obj)):
+            # Pre-flush history, so a moved control touches both frameworks
+            framework_ids.update(inspect(obj).attrs.framework_id.history.sum())
+    framework_ids.discard(None)
+    
+    if framework_ids:
+        session.connection().execute(
+            update(Framework.__table__)
+            .where(Framework.__table__.c.id.in_(framework_ids))
+            .values(last_updated=datetime.utcnow())
+        )
@@ -0,0 +1,24 @@
+"""
+Redis client management.
+"""
+
+from functools import lru_cache
+
+import redis
+import redis.asyncio as aioredis
+
+from src.config import settings
+
+@lru_cache(maxsize=1)
+def get_redis() -> redis.Redis:
+    """Get the process-wide sync Redis client (Celery workers)"""
+    return redis.Redis.from_url(settings.redis_url)
+
+@lru_cache(maxsize=1)
+def get_async_redis() -> aioredis.Redis:
+    """Get the process-wide async Redis client (API)"""
+    return aioredis.from_url(settings.redis_url)
+
+def rules_key(framework_id: int) -> str:
+    """Redis key holding a framework's serialized scanner rules"""
+    return f"rules:{framework_id}"
@@ -2,27 +2,57 @@
 Database session management.
 """
 
-from typing import Generator, AsyncGenerator
+from typing import Any, Generator, AsyncGenerator
+import os
+import orjson
 from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import scoped_session, sessionmaker, Session
 
 from src.config import settings
 
+
+def _json_dumps(obj: Any) -> str:
+    # Scanner reports stored in the JSON columns can run to megabytes;
+    # orjson encodes them several times faster than the stdlib
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
 # Create the SQLAlchemy async engine
 async_engine = create_async_engine(
     settings.database_url_async,
     pool_size=settings.db_pool_size,
     max_overflow=settings.db_max_overflow,
-    echo=settings.db_echo
+    echo=settings.db_echo,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    pool_timeout=5,  # Fail fast instead of queueing behind an exhausted pool
+    json_serializer=_json_dumps,
+    json_deserializer=orjson.loads
 )
 
-# Create sync engine for Celery workers
+# Celery pools that run several tasks in one process, on one connection pool
+THREADED_POOLS = ("threads", "gevent", "eventlet")
+
+# Create sync engine for Celery workers only; API endpoints use the async engine.
+# Every prefork child gets its own pool (see reset_db_pool) and runs one task
+# at a time, so two connections cover it; a threaded pool runs as many tasks
+# as the worker's concurrency on one. Pre-pinged so a connection that died
+# while a worker sat idle never fails the next task, and LIFO so a small hot
+# set of connections is reused
 sync_engine = create_engine(
     settings.database_url,
-    pool_size=settings.db_pool_size,
-    max_overflow=settings.db_max_overflow,
-    echo=settings.db_echo
+    pool_size=(
+        settings.celery_concurrency or os.cpu_count() or 1
+        if settings.celery_pool in THREADED_POOLS
+        else 2
+    ),
+    max_overflow=4,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    pool_use_lifo=True,
+    echo=settings.db_echo,
+    json_serializer=_json_dumps,
+    json_deserializer=orjson.loads
 )
 
 # Create async session factory
@@ -32,13 +62,24 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False
 )
 
-# Create sync session factory
+# Create sync session factory (celery only)
 SyncSessionLocal = sessionmaker(
     bind=sync_engine,
     autocommit=False,
     autoflush=False
 )
 
+# Thread-local sync sessions. Under prefork each child has just one task
+# thread; with CELERY_POOL=threads one task instance serves several threads
+# at once, each needing its own session. remove() hands the connection back
+# to the process's pool. Tasks finish with their commit, so nothing is
+# expired for reloading after it
+ScopedSyncSession = scoped_session(sessionmaker(
+    bind=sync_engine,
+    autoflush=False,
+    expire_on_commit=False
+))
+
 async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
     """Get async database session"""
     async with AsyncSessionLocal() as session:
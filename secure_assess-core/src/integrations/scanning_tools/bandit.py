@@ -1,20 +1,49 @@
 import json
-import subprocess
 import tempfile
-from typing import Dict, Any, Optional
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional
 import os
-from git import Repo
+from bandit.core import config as bandit_config
+from bandit.core import manager as bandit_manager
 
+from src.config import settings
 from src.core.logging import get_logger
+from src.services.workspace.ephemeral_workspace import workspace_root
+from src.services.workspace.git_service import GitService
 
 logger = get_logger(__name__)
 
+# Below this many files per shard, process start-up costs more than it saves
+MIN_FILES_PER_SHARD = 50
+
+
+def _run_bandit_shard(rules_file: Optional[str], files: List[str]) -> Dict[str, Any]:
+    """
+    Run Bandit over one shard of files.
+    
+    Module-level so it can be shipped to a worker process; issues come back
+    as plain dicts in the same shape as Bandit's JSON report.
+    """
+    b_conf = bandit_config.BanditConfig(config_file=rules_file)
+    b_mgr = bandit_manager.BanditManager(b_conf, "file")
+    b_mgr.files_list = files
+    b_mgr.run_tests()
+    
+    return {
+        "results": [issue.as_dict() for issue in b_mgr.get_issue_list()],
+        "metrics": b_mgr.metrics.data,
+        "skipped": b_mgr.skipped
+    }
+
+
 class BanditScanner:
     def scan_repository(
         self,
         repository_url: str,
         branch: str,
-        custom_rules: Optional[Dict[str, Any]] = None
+        custom_rules: Optional[Dict[str, Any]] = None,
+        include_raw: bool = False
     ) -> Dict[str, Any]:
         """
         Scan a Git repository using Bandit.
@@ -23,79 +52,132 @@ class BanditScanner:
             repository_url: URL of the repository to scan
             branch: Branch to scan
             custom_rules: Optional custom Bandit rules to apply
+            include_raw: Also return the full Bandit report
             
         Returns:
             Dict containing scan results
         """
         try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # Clone repository
-                logger.info(f"Cloning {repository_url}:{branch} to {temp_dir}")
-                repo = Repo.clone_from(repository_url, temp_dir, branch=branch)
-                
-                # Write custom rules if provided
-                rules_file = None
-                if custom_rules:
-                    rules_file = os.path.join(temp_dir, "custom_rules.json")
-                    with open(rules_file, 'w') as f:
-                        json.dump(custom_rules, f)
-                
-                # Run Bandit scan
-                cmd = [
-                    "bandit",
-                    "-r",      # Recursive scan
-                    ".",       # Current directory
-                    "-f",      # Output format
-                    "json"     # JSON output
-                ]
-                
-                # Add custom rules if provided
-                if rules_file:
-                    cmd.extend([
-                        "--config",
-                        rules_file
-                    ])
-                
-                logger.info("Running Bandit scan")
-                process = subprocess.run(
-                    cmd,
-                    cwd=temp_dir,
-                    capture_output=True,
-                    text=True
-                )
-                
-                # Parse results
-                try:
-                    raw_output = json.loads(process.stdout)
-                except json.JSONDecodeError:
-                    logger.error("Failed to parse Bandit output")
-                    raw_output = {}
+            with tempfile.TemporaryDirectory(dir=workspace_root()) as temp_dir:
+                # Check out the branch tip from the shared repository cache
+                logger.info(f"Checking out {repository_url}:{branch} to {temp_dir}")
+                GitService().checkout(repository_url, branch, temp_dir)
                 
-                # Process results
-                issues = []
-                for result in raw_output.get("results", []):
-                    issues.append({
-                        "severity": result.get("issue_severity", "unknown"),
-                        "confidence": result.get("issue_confidence", "unknown"),
-                        "type": result.get("issue_text", "unknown"),
-                        "file": result.get("filename", "unknown"),
-                        "line": result.get("line_number", 0),
-                        "code": result.get("code", ""),
-                        "description": result.get("issue_text", "")
-                    })
-                
-                return {
-                    "issues": issues,
-                    "metrics": {
-                        "total_files": raw_output.get("metrics", {}).get("_totals", {}).get("CONFIDENCE.HIGH", 0),
-                        "total_lines": raw_output.get("metrics", {}).get("_totals", {}).get("loc", 0),
-                        "high_severity": len([i for i in issues if i["severity"] == "HIGH"]),
-                        "medium_severity": len([i for i in issues if i["severity"] == "MEDIUM"]),
-                        "low_severity": len([i for i in issues if i["severity"] == "LOW"])
-                    },
-                    "raw_output": raw_output
-                }
+                return self.scan_path(temp_dir, custom_rules, include_raw)
                 
         except Exception as e:
             logger.error(f"Bandit scan failed: {str(e)}")
             raise
+    
+    def scan_path(
+        self,
+        path: str,
+        custom_rules: Optional[Dict[str, Any]] = None,
+        include_raw: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Scan an existing checkout using Bandit.
+        
+        Args:
+            path: Directory to scan, left unmodified
+            custom_rules: Optional custom Bandit rules to apply
+            include_raw: Also return the full Bandit report
+            
+        Returns:
+            Dict containing scan results, with file paths relative to path
+        """
+        # The rules file lives outside the checkout, which other scanners
+        # may be reading at the same time
+        with tempfile.TemporaryDirectory(dir=workspace_root()) as rules_dir:
+            # Write custom rules if provided
+            rules_file = None
+            if custom_rules:
+                rules_file = os.path.join(rules_dir, "custom_rules.json")
+                with open(rules_file, 'w') as f:
+                    json.dump(custom_rules, f)
+            
+            # Run Bandit in-process: no interpreter start-up, plugin
+            # re-import or JSON round-trip through stdout per scan
+            logger.info("Running Bandit scan")
+            shards = self._run_bandit(path, rules_file)
+            
+            # Merge shard reports; per-file metrics are disjoint and the
+            # totals are plain counters
+            totals: Dict[str, Any] = {}
+            metrics: Dict[str, Any] = {}
+            for shard in shards:
+                shard_metrics = dict(shard["metrics"])
+                for key, value in shard_metrics.pop("_totals", {}).items():
+                    totals[key] = totals.get(key, 0) + value
+                metrics.update(shard_metrics)
+            metrics["_totals"] = totals
+            
+            raw_output = {
+                "results": [
+                    {**result, "filename": os.path.relpath(result["filename"], path)}
+                    for shard in shards
+                    for result in shard["results"]
+                ],
+                "metrics": metrics,
+                "errors": [
+                    {"filename": os.path.relpath(fname, path), "reason": reason}
+                    for shard in shards
+                    for fname, reason in shard["skipped"]
+                ]
+            }
+            
+            # Process results
+            issues = [
+                {
+                    "severity": result.get("issue_severity", "unknown"),
+                    "confidence": result.get("issue_confidence", "unknown"),
+                    "type": result.get("issue_text", "unknown"),
+                    "file": result.get("filename", "unknown"),
+                    "line": result.get("line_number", 0),
+                    "code": result.get("code", ""),
+                    "description": result.get("issue_text", "")
+                }
+                for result in raw_output["results"]
+            ]
+            severity_counts = Counter(issue["severity"] for issue in issues)
+            
+            report = {
+                "issues": issues,
+                "metrics": {
+                    "total_files": totals.get("CONFIDENCE.HIGH", 0),
+                    "total_lines": totals.get("loc", 0),
+                    "high_severity": severity_counts["HIGH"],
+                    "medium_severity": severity_counts["MEDIUM"],
+                    "low_severity": severity_counts["LOW"]
+                }
+            }
+            # As for Semgrep, only callers that persist the report get it back
+            if include_raw:
+                report["raw_output"] = raw_output
+            return report
+    
+    def _run_bandit(self, target_dir: str, rules_file: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Discover files once, then run Bandit over them, in up to
+        BANDIT_WORKERS parallel shards.
+        
+        Args:
+            target_dir: Directory to scan
+            rules_file: Optional Bandit config file
+            
+        Returns:
+            List of per-shard reports
+        """
+        b_conf = bandit_config.BanditConfig(config_file=rules_file)
+        b_mgr = bandit_manager.BanditManager(b_conf, "file")
+        b_mgr.discover_files([target_dir], recursive=True)
+        files = b_mgr.files_list
+        
+        workers = min(settings.bandit_workers, len(files) // MIN_FILES_PER_SHARD)
+        if workers <= 1:
+            return [_run_bandit_shard(rules_file, files)]
+        
+        # AST parsing and plugin checks are CPU-bound, so shard across processes
+        shards = [files[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(_run_bandit_shard, [rules_file] * workers, shards))
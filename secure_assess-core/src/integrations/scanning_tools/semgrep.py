@@ -1,20 +1,119 @@
-import json
+import asyncio
+import hashlib
 import subprocess
 import tempfile
-from typing import Dict, Any, Optional
+from collections import defaultdict
+from fnmatch import fnmatch
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, List, Optional
 import os
+import signal
+import threading
+import orjson
 from git import Repo
 
+from src.config import settings
 from src.core.logging import get_logger
+from src.integrations.scanning_tools.semgrep_cache import SemgrepResultCache
+from src.services.workspace.ephemeral_workspace import workspace_root
+from src.services.workspace.git_service import GitService
 
 logger = get_logger(__name__)
 
+# Caps concurrent async scans per process; each Semgrep run is already
+# multi-core, so more would only contend for CPU, disk and memory
+SCAN_SEMAPHORE = asyncio.Semaphore(max(1, (os.cpu_count() or 2) // 2))
+
+# Git modes of regular files; symlinks and submodules are not cached
+FILE_MODES = ("100644", "100755")
+
+
+@lru_cache(maxsize=1)
+def _semgrep_version() -> str:
+    """Installed Semgrep version, part of the result cache key"""
+    return subprocess.run(
+        ["semgrep", "--version"],
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout.strip()
+
+
+def _rules_hash(rules: Dict[str, Any]) -> str:
+    return hashlib.sha256(orjson.dumps(rules, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def _rules_file(rules: Dict[str, Any], rules_hash: str) -> str:
+    """
+    Get the persistent config file for a rule set, writing it on first use.
+    
+    Named by content hash, so an existing file is always current and scans
+    sharing a rule set share one file.
+    """
+    rules_dir = Path(settings.semgrep_rules_dir).expanduser()
+    path = rules_dir / f"{rules_hash}.yaml"
+    if not path.exists():
+        rules_dir.mkdir(parents=True, exist_ok=True)
+        # JSON is valid YAML, so Semgrep reads it as is. A unique temp file
+        # so concurrent scans, in other processes or threads, never share one
+        with tempfile.NamedTemporaryFile(dir=rules_dir, suffix=".tmp", delete=False) as tmp:
+            tmp.write(orjson.dumps(rules, option=orjson.OPT_SORT_KEYS))
+        os.replace(tmp.name, path)
+    return str(path)
+
+
+def _excluded(path: str) -> bool:
+    """Whether a path falls under one of the SEMGREP_EXCLUDE patterns"""
+    parts = path.split("/")
+    return any(
+        fnmatch(path, pattern)
+        or path.startswith(pattern.rstrip("/") + "/")
+        or any(fnmatch(part, pattern) for part in parts)
+        for pattern in settings.semgrep_exclude
+    )
+
+
+def _blob_shas(checkout_dir: str) -> Dict[str, str]:
+    """Map each tracked, non-excluded file to its blob SHA, as already recorded by git"""
+    listing = Repo(checkout_dir).git.ls_files("-s", "-z")
+    blobs = {}
+    for entry in filter(None, listing.split("\0")):
+        meta, path = entry.split("\t", 1)
+        mode, blob_sha, _ = meta.split(" ")
+        if mode in FILE_MODES and not _excluded(path):
+            blobs[path] = blob_sha
+    return blobs
+
+
 class SemgrepScanner:
+    def __init__(self):
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        self._terminated = False
+    
+    def terminate(self) -> None:
+        """
+        Kill a running Semgrep and keep this scanner from starting another.
+        
+        Safe to call from another thread than the one scanning, which then
+        fails its scan. Semgrep runs in its own process group, so its
+        semgrep-core children go with it.
+        """
+        with self._lock:
+            self._terminated = True
+            if self._process is not None and self._process.poll() is None:
+                try:
+                    os.killpg(self._process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+    
     def scan_repository(
         self,
         repository_url: str,
         branch: str,
-        rules: Optional[Dict[str, Any]] = None
+        rules: Optional[Dict[str, Any]] = None,
+        include_raw: bool = False
     ) -> Dict[str, Any]:
         """
         Scan a Git repository using Semgrep.
@@ -23,80 +122,237 @@ class SemgrepScanner:
             repository_url: URL of the repository to scan
             branch: Branch to scan
             rules: Optional custom Semgrep rules to apply
+            include_raw: Also return the full parsed Semgrep report
             
         Returns:
             Dict containing scan results
         """
         try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # Clone repository
-                logger.info(f"Cloning {repository_url}:{branch} to {temp_dir}")
-                repo = Repo.clone_from(repository_url, temp_dir, branch=branch)
+            with tempfile.TemporaryDirectory(dir=workspace_root()) as temp_dir:
+                # Check out the branch tip from the shared repository cache
+                logger.info(f"Checking out {repository_url}:{branch} to {temp_dir}")
+                GitService().checkout(repository_url, branch, temp_dir)
                 
-                # Write rules if provided
-                rules_file = None
-                if rules:
-                    rules_file = os.path.join(temp_dir, "semgrep-rules.yaml")
-                    with open(rules_file, 'w') as f:
-                        json.dump(rules, f)
+                return self.scan_path(temp_dir, rules, include_raw)
                 
-                # Build Semgrep command
-                cmd = [
-                    "semgrep",
-                    "--json",    # JSON output
-                    "--quiet",   # Less verbose output
-                    "-a",        # Run all rules
-                ]
+        except Exception as e:
+            logger.error(f"Semgrep scan failed: {str(e)}")
+            raise
+    
+    def scan_path(
+        self,
+        path: str,
+        rules: Optional[Dict[str, Any]] = None,
+        include_raw: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Scan an existing checkout using Semgrep.
+        
+        Args:
+            path: Git checkout to scan, left unmodified
+            rules: Optional custom Semgrep rules to apply
+            include_raw: Also return the full parsed Semgrep report
+            
+        Returns:
+            Dict containing scan results, with file paths relative to path
+        """
+        # The report is written outside the checkout so it is never scanned
+        # itself, and so scanners sharing the checkout do not see it
+        with tempfile.TemporaryDirectory(dir=workspace_root()) as report_dir:
+            report_file = os.path.join(report_dir, "semgrep-report.json")
+            
+            # Reuse the persistent rules file if provided
+            rules_file = None
+            rules_hash = None
+            if rules:
+                rules_hash = _rules_hash(rules)
+                rules_file = _rules_file(rules, rules_hash)
+            
+            # Only files whose content has not been scanned under these
+            # rules and this Semgrep version need scanning. The "auto"
+            # registry config changes underneath us, so it is never cached
+            cache = None
+            blobs: Dict[str, str] = {}
+            cached: Dict[str, Any] = {}
+            if rules and settings.enable_incremental_scan:
+                blobs = _blob_shas(path)
+                cache = SemgrepResultCache(rules_hash, _semgrep_version())
+                cached = cache.get_many(set(blobs.values()))
+            misses = [file_path for file_path, blob_sha in blobs.items() if blob_sha not in cached]
+            # Past the threshold one full scan beats a long target list
+            incremental = cache is not None and len(misses) <= settings.full_scan_file_threshold
+            targets = misses if incremental else list(blobs)
+            
+            # Build Semgrep command
+            cmd = [
+                "semgrep",
+                "--json",    # JSON output
+                "--quiet",   # Less verbose output
+                "-a",        # Run all rules
+                "--output", report_file,  # Report to disk, not through a pipe
+                "--jobs", str(settings.semgrep_jobs or os.cpu_count() or 1),
+                "--max-memory", str(settings.semgrep_max_memory_mb),
+                "--metrics=off"
+            ]
+            # Vendored, generated and fixture code dominates runtime
+            # without being the project's own code
+            for pattern in settings.semgrep_exclude:
+                cmd.extend(["--exclude", pattern])
+            
+            # Add rules file if provided
+            if rules_file:
+                cmd.extend(["--config", rules_file])
+            else:
+                cmd.extend(["--config", "auto"])  # Use default rules
                 
-                # Add rules file if provided
-                if rules_file:
-                    cmd.extend(["--config", rules_file])
-                else:
-                    cmd.extend(["--config", "auto"])  # Use default rules
-                    
+            if incremental:
+                cmd.extend(["--", *misses])  # Scan only the changed files
+            else:
                 cmd.append(".")  # Scan current directory
-                
-                logger.info("Running Semgrep scan")
-                process = subprocess.run(
-                    cmd,
-                    cwd=temp_dir,
-                    capture_output=True,
-                    text=True
-                )
+            
+            if incremental and not misses:
+                logger.info(f"All {len(blobs)} files cached, skipping Semgrep")
+                raw_output = {"results": [], "errors": [], "paths": {"scanned": []}}
+            else:
+                logger.info(f"Running Semgrep scan over {len(misses) if incremental else 'all'} files")
+                with self._lock:
+                    if self._terminated:
+                        if cache is not None:
+                            cache.close()
+                        raise RuntimeError("Semgrep scan was terminated")
+                    process = self._process = subprocess.Popen(
+                        cmd,
+                        cwd=path,
+                        stdout=subprocess.DEVNULL,
+                        stderr=subprocess.PIPE,
+                        text=True,
+                        start_new_session=True
+                    )
+                try:
+                    # A hung Semgrep is killed and reported here, before the
+                    # task's soft time limit, rather than left running
+                    _, stderr = process.communicate(timeout=settings.scanner_timeout_seconds)
+                except subprocess.TimeoutExpired:
+                    self.terminate()
+                    process.communicate()
+                    if cache is not None:
+                        cache.close()
+                    raise RuntimeError(f"Semgrep timed out after {settings.scanner_timeout_seconds} s")
                 
                 # Parse results
                 try:
-                    raw_output = json.loads(process.stdout)
-                except json.JSONDecodeError:
-                    logger.error("Failed to parse Semgrep output")
+                    with open(report_file, 'rb') as f:
+                        raw_output = orjson.loads(f.read())
+                except (OSError, orjson.JSONDecodeError):
                     raw_output = {}
                 
-                # Process results
-                issues = []
-                for result in raw_output.get("results", []):
-                    issues.append({
-                        "severity": result.get("extra", {}).get("severity", "unknown"),
-                        "confidence": "high",  # Semgrep doesn't provide confidence
-                        "type": result.get("check_id", "unknown"),
-                        "file": result.get("path", "unknown"),
-                        "line": result.get("start", {}).get("line", 0),
-                        "code": result.get("extra", {}).get("lines", ""),
-                        "message": result.get("extra", {}).get("message", "")
-                    })
-                
-                return {
-                    "issues": issues,
-                    "metrics": {
-                        "total_files": len(raw_output.get("paths", {}).get("scanned", [])),
-                        "total_lines": sum(len(i.get("extra", {}).get("lines", "").split("\n"))
-                                        for i in raw_output.get("results", [])),
-                        "high_severity": len([i for i in issues if i["severity"] == "ERROR"]),
-                        "medium_severity": len([i for i in issues if i["severity"] == "WARNING"]),
-                        "low_severity": len([i for i in issues if i["severity"] == "INFO"])
-                    },
-                    "raw_output": raw_output
+                # Exit code 1 only means findings were reported. Anything
+                # else, or no report, is a failed run: merging cached results
+                # into it would pass it off as a clean scan
+                if process.returncode not in (0, 1) or not raw_output:
+                    if cache is not None:
+                        cache.close()
+                    raise RuntimeError(
+                        f"Semgrep failed with exit code {process.returncode}: {stderr.strip()}"
+                    )
+            
+            if cache is not None:
+                try:
+                    self._store_results(cache, blobs, targets, raw_output)
+                    if incremental:
+                        self._merge_cached(blobs, cached, raw_output)
+                finally:
+                    cache.close()
+            
+            # Process results, counting severities and lines in the same pass
+            issues = []
+            severity_counts: Dict[str, int] = {"ERROR": 0, "WARNING": 0, "INFO": 0}
+            total_lines = 0
+            for result in raw_output.get("results", []):
+                extra = result.get("extra", {})
+                severity = extra.get("severity", "unknown")
+                lines = extra.get("lines", "")
+                issues.append({
+                    "severity": severity,
+                    "confidence": "high",  # Semgrep doesn't provide confidence
+                    "type": result.get("check_id", "unknown"),
+                    "file": result.get("path", "unknown"),
+                    "line": result.get("start", {}).get("line", 0),
+                    "code": lines,
+                    "message": extra.get("message", "")
+                })
+                severity_counts[severity] = severity_counts.get(severity, 0) + 1
+                total_lines += lines.count("\n") + 1
+            
+            report = {
+                "issues": issues,
+                "metrics": {
+                    "total_files": len(raw_output.get("paths", {}).get("scanned", [])),
+                    "total_lines": total_lines,
+                    "high_severity": severity_counts["ERROR"],
+                    "medium_severity": severity_counts["WARNING"],
+                    "low_severity": severity_counts["INFO"]
                 }
-                
-        except Exception as e:
-            logger.error(f"Semgrep scan failed: {str(e)}")
-            raise
+            }
+            # The report can be far larger than the issues derived from
+            # it, so only callers that persist it get it back
+            if include_raw:
+                report["raw_output"] = raw_output
+            return report
+    
+    async def scan_repository_async(
+        self,
+        repository_url: str,
+        branch: str,
+        rules: Optional[Dict[str, Any]] = None,
+        include_raw: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Async counterpart of scan_repository.
+        
+        The checkout, the Semgrep run and the report parsing all happen in a
+        worker thread so the event loop keeps serving requests meanwhile.
+        Scans beyond SCAN_SEMAPHORE's limit wait for a slot.
+        """
+        async with SCAN_SEMAPHORE:
+            return await asyncio.to_thread(self.scan_repository, repository_url, branch, rules, include_raw)
+    
+    def _store_results(
+        self,
+        cache: SemgrepResultCache,
+        blobs: Dict[str, str],
+        targets: List[str],
+        raw_output: Dict[str, Any]
+    ) -> None:
+        """Cache the results of every scanned target, including clean ones"""
+        by_path: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for result in raw_output.get("results", []):
+            by_path[result.get("path")].append(
+                {key: value for key, value in result.items() if key != "path"}
+            )
+        scanned = set(raw_output.get("paths", {}).get("scanned", []))
+        # Errors such as timeouts may not recur, so those files are retried
+        failed = {error.get("path") for error in raw_output.get("errors", [])}
+        
+        cache.put_many(
+            (blobs[path], path in scanned, by_path.get(path, []))
+            for path in targets
+            if path not in failed
+        )
+    
+    def _merge_cached(
+        self,
+        blobs: Dict[str, str],
+        cached: Dict[str, Any],
+        raw_output: Dict[str, Any]
+    ) -> None:
+        """Add cached results to an incremental report under their current paths"""
+        results = raw_output.setdefault("results", [])
+        scanned_paths = raw_output.setdefault("paths", {}).setdefault("scanned", [])
+        for path, blob_sha in blobs.items():
+            if blob_sha not in cached:
+                continue
+            scanned, cached_results = cached[blob_sha]
+            results.extend({**result, "path": path} for result in cached_results)
+            if scanned:
+                scanned_paths.append(path)
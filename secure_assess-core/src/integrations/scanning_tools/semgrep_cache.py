@@ -0,0 +1,86 @@
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import orjson
+
+from src.config import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS findings (
+    blob_sha TEXT NOT NULL,
+    rules_hash TEXT NOT NULL,
+    version TEXT NOT NULL,
+    scanned INTEGER NOT NULL,
+    results BLOB NOT NULL,
+    PRIMARY KEY (blob_sha, rules_hash, version)
+)
+"""
+
+# SQLite's default limit on host parameters per statement
+MAX_PARAMS = 999
+
+
+class SemgrepResultCache:
+    """
+    Semgrep results per file content.
+    
+    Keyed by git blob SHA, rules hash and Semgrep version, so a file whose
+    content, rules and scanner are all unchanged never has to be scanned
+    again. Results are stored with their path stripped; callers re-attach
+    the path the blob has in the tree being scanned.
+    """
+    
+    def __init__(self, rules_hash: str, version: str, path: Optional[str] = None):
+        self.rules_hash = rules_hash
+        self.version = version
+        self.path = Path(path or settings.semgrep_cache_path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Several worker processes share the file; WAL lets readers proceed
+        # while another scan writes
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(SCHEMA)
+    
+    def get_many(self, blob_shas: Iterable[str]) -> Dict[str, Tuple[bool, List[Dict[str, Any]]]]:
+        """
+        Look up cached results for a set of blobs.
+        
+        Args:
+            blob_shas: Blob SHAs to look up
+        
+        Returns:
+            Dict mapping each cached blob SHA to (scanned, results)
+        """
+        shas = list(blob_shas)
+        cached = {}
+        for i in range(0, len(shas), MAX_PARAMS - 2):
+            chunk = shas[i:i + MAX_PARAMS - 2]
+            rows = self.conn.execute(
+                f"SELECT blob_sha, scanned, results FROM findings "
+                f"WHERE rules_hash = ? AND version = ? "
+                f"AND blob_sha IN ({','.join('?' * len(chunk))})",
+                [self.rules_hash, self.version, *chunk]
+            )
+            for blob_sha, scanned, results in rows:
+                cached[blob_sha] = (bool(scanned), orjson.loads(results))
+        return cached
+    
+    def put_many(self, entries: Iterable[Tuple[str, bool, List[Dict[str, Any]]]]) -> None:
+        """
+        Store results for scanned blobs.
+        
+        Args:
+            entries: (blob_sha, scanned, results) for each blob
+        """
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO findings VALUES (?, ?, ?, ?, ?)",
+                (
+                    (blob_sha, self.rules_hash, self.version, int(scanned), orjson.dumps(results))
+                    for blob_sha, scanned, results in entries
+                )
+            )
+    
+    def close(self) -> None:
+        self.conn.close()
@@ -4,7 +4,7 @@ Sets up the API with middleware, routes, and lifecycle events.
 """
 
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request
+from fastapi import APIRouter, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import logging
@@ -12,13 +12,10 @@ import time
 
 from src.config import settings
 
-# Configure logging
-logging.basicConfig(
-    level=getattr(logging, settings.log_level.upper()),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
+router = APIRouter()
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -51,41 +48,17 @@ async def lifespan(app: FastAPI):
     logger.info("Application shutdown complete")
 
 
-# Create FastAPI application
-app = FastAPI(
-    title=settings.app_name,
-    version=settings.app_version,
-    description="API for automated security scanning and compliance checking",
-    docs_url=f"{settings.api_prefix}/docs",
-    redoc_url=f"{settings.api_prefix}/redoc",
-    openapi_url=f"{settings.api_prefix}/openapi.json",
-    lifespan=lifespan,
-    debug=settings.debug
-)
-
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.cors_origins,
-    allow_credentials=settings.cors_credentials,
-    allow_methods=settings.cors_methods,
-    allow_headers=settings.cors_headers,
-)
-
-
 # Request timing middleware
-@app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
     """Add processing time to response headers."""
-    start_time = time.time()
+    start_ns = time.perf_counter_ns()
     response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
+    # Integer microseconds; perf_counter is monotonic, unlike time.time()
+    response.headers["X-Process-Time"] = str((time.perf_counter_ns() - start_ns) // 1000)
     return response
 
 
 # Exception handlers
-@app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler for unhandled errors."""
     logger.error(f"Unhandled exception: {exc}", exc_info=True)
@@ -100,7 +73,7 @@ async def global_exception_handler(request: Request, exc: Exception):
 
 
 # Root endpoint
-@app.get("/")
+@router.get("/")
 async def root():
     """Root endpoint - API information."""
     return {
@@ -113,7 +86,7 @@ async def root():
 
 
 # Health check endpoint
-@app.get(f"{settings.api_prefix}/health")
+@router.get(f"{settings.api_prefix}/health")
 async def health_check():
     """
     Health check endpoint.
@@ -136,7 +109,7 @@ async def health_check():
 
 
 # Readiness check endpoint (for Kubernetes)
-@app.get(f"{settings.api_prefix}/ready")
+@router.get(f"{settings.api_prefix}/ready")
 async def readiness_check():
     """
     Readiness check endpoint.
@@ -149,7 +122,7 @@ async def readiness_check():
 
 
 # Liveness check endpoint (for Kubernetes)
-@app.get(f"{settings.api_prefix}/alive")
+@router.get(f"{settings.api_prefix}/alive")
 async def liveness_check():
     """
     Liveness check endpoint.
@@ -160,16 +133,57 @@ async def liveness_check():
     }
 
 
-# TODO: Include routers
-# from src.api.v1.router import api_router
-# app.include_router(api_router, prefix=settings.api_prefix)
+def create_app() -> FastAPI:
+    """
+    Build the FastAPI application.
+    
+    Nothing is configured at import time, so workers, scripts and tests can
+    import this module without setting up logging or the app.
+    """
+    # Configure logging
+    logging.basicConfig(
+        level=getattr(logging, settings.log_level.upper()),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    # Create FastAPI application
+    app = FastAPI(
+        title=settings.app_name,
+        version=settings.app_version,
+        description="API for automated security scanning and compliance checking",
+        docs_url=f"{settings.api_prefix}/docs",
+        redoc_url=f"{settings.api_prefix}/redoc",
+        openapi_url=f"{settings.api_prefix}/openapi.json",
+        lifespan=lifespan,
+        debug=settings.debug
+    )
+    
+    # Add CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins,
+        allow_credentials=settings.cors_credentials,
+        allow_methods=settings.cors_methods,
+        allow_headers=settings.cors_headers,
+    )
+    app.middleware("http")(add_process_time_header)
+    app.add_exception_handler(Exception, global_exception_handler)
+    
+    app.include_router(router)
+    
+    # TODO: Include routers
+    # from src.api.v1.router import api_router
+    # app.include_router(api_router, prefix=settings.api_prefix)
+    
+    return app
 
 
 if __name__ == "__main__":
     import uvicorn
     
     uvicorn.run(
-        "src.main:app",
+        "src.main:create_app",
+        factory=True,
         host=settings.api_host,
         port=settings.api_port,
         reload=settings.debug,
@@ -1,19 +1,31 @@
-from typing import Dict, List, Optional
-from datetime import datetime
+from typing import Dict, List, Optional, Union
+from datetime import datetime, timezone
 import uuid
+from celery import chord, group
+from sqlalchemy import Row, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from src.db.postgres.models import ScanResults
+from src.db.postgres.models import ScanFinding, ScanResult
 from src.workers.sast_worker import run_sast_scan
 from src.workers.dast_worker import run_dast_scan
 from src.workers.sca_worker import run_sca_scan
+from src.workers.aggregate_worker import aggregate_scan_results, mark_scan_failed
 from src.services.scanning.scheduler import ScanScheduler
+from src.services.scanning.scoring import AGGREGATE_SCORE_SQL
 from src.core.logging import get_logger
 
 logger = get_logger(__name__)
 
 class ScanOrchestrator:
-    def __init__(self, db: Session):
+    """
+    Coordinates scan records and scan task dispatch.
+    
+    The plain methods expect an AsyncSession; the ``*_sync`` variants do the
+    same work on a regular Session for scripts and Celery workers.
+    """
+    
+    def __init__(self, db: Union[AsyncSession, Session]):
         self.db = db
         self.scheduler = ScanScheduler()
     
@@ -34,95 +46,161 @@ class ScanOrchestrator:
             framework_id: ID of the compliance framework to use
             scan_types: List of scan types to perform
             priority: Priority of the scan (1-10, higher is more urgent)
-            
+        
         Returns:
             scan_id: Unique identifier for the scan
         """
-        scan_id = str(uuid.uuid4())
-        
-        # Create scan record
-        scan_result = ScanResults(
-            scan_id=scan_id,
-            framework_id=framework_id,
-            repository_url=repository_url,
-            branch=branch,
-            scan_date=datetime.utcnow(),
-            status="pending",
-            findings={},
-            compliance_score=0.0,
-            raw_output={}
-        )
+        scan_result = self._new_scan_record(repository_url, branch, framework_id)
+        scan_id = scan_result.scan_id
         
         self.db.add(scan_result)
         await self.db.commit()
         
         try:
-            # Queue different scan types
-            scan_tasks = []
-            
-            if "sast" in scan_types:
-                task = run_sast_scan.apply_async(
-                    args=[scan_id, repository_url, branch],
-                    priority=priority,
-                    queue="sast"
-                )
-                scan_tasks.append(task)
-            
-            if "dast" in scan_types:
-                task = run_dast_scan.apply_async(
-                    args=[scan_id, repository_url],
-                    priority=priority,
-                    queue="dast"
-                )
-                scan_tasks.append(task)
+            self._dispatch_scans(scan_id, repository_url, branch, scan_types, priority)
             
-            if "sca" in scan_types:
-                task = run_sca_scan.apply_async(
-                    args=[scan_id, repository_url, branch],
-                    priority=priority,
-                    queue="sca"
-                )
-                scan_tasks.append(task)
-            
-            # Update scan status
-            scan_result.status = "in_progress"
+            logger.info(f"Initiated scan {scan_id} for {repository_url}:{branch}")
+            return scan_id
+        
+        except Exception as e:
+            logger.error(f"Failed to initiate scan: {str(e)}")
+            await self.db.execute(self._mark_failed(scan_id))
             await self.db.commit()
+            raise
+    
+    def initiate_scan_sync(
+        self,
+        repository_url: str,
+        branch: str,
+        framework_id: int,
+        scan_types: List[str] = ["sast", "dast", "sca"],
+        priority: int = 5
+    ) -> str:
+        """Synchronous counterpart of initiate_scan."""
+        scan_result = self._new_scan_record(repository_url, branch, framework_id)
+        scan_id = scan_result.scan_id
+        
+        self.db.add(scan_result)
+        self.db.commit()
+        
+        try:
+            self._dispatch_scans(scan_id, repository_url, branch, scan_types, priority)
             
             logger.info(f"Initiated scan {scan_id} for {repository_url}:{branch}")
             return scan_id
-            
+        
         except Exception as e:
             logger.error(f"Failed to initiate scan: {str(e)}")
-            scan_result.status = "failed"
+            self.db.execute(self._mark_failed(scan_id))
+            self.db.commit()
+            raise
+    
+    async def initiate_scans_bulk(
+        self,
+        scans: List[Dict],
+        scan_types: List[str] = ["sast", "dast", "sca"],
+        priority: int = 5
+    ) -> List[str]:
+        """
+        Initiates many scans with one INSERT and one broker publish.
+        
+        Args:
+            scans: Dicts with repository_url, branch and framework_id keys
+            scan_types: List of scan types to perform for every scan
+            priority: Priority of the scans (1-10, higher is more urgent)
+        
+        Returns:
+            scan_ids in the same order as scans
+        """
+        rows = [self._new_scan_row(**scan) for scan in scans]
+        scan_ids = [row["scan_id"] for row in rows]
+        if not rows:
+            return scan_ids
+        
+        await self.db.execute(insert(ScanResult), rows)
+        await self.db.commit()
+        
+        try:
+            self._dispatch_bulk(rows, scan_types, priority)
+            
+            logger.info(f"Initiated {len(scan_ids)} scans")
+            return scan_ids
+        
+        except Exception as e:
+            logger.error(f"Failed to initiate scans: {str(e)}")
+            await self.db.execute(self._mark_failed(*scan_ids))
             await self.db.commit()
             raise
     
+    def initiate_scans_bulk_sync(
+        self,
+        scans: List[Dict],
+        scan_types: List[str] = ["sast", "dast", "sca"],
+        priority: int = 5
+    ) -> List[str]:
+        """Synchronous counterpart of initiate_scans_bulk."""
+        rows = [self._new_scan_row(**scan) for scan in scans]
+        scan_ids = [row["scan_id"] for row in rows]
+        if not rows:
+            return scan_ids
+        
+        self.db.execute(insert(ScanResult), rows)
+        self.db.commit()
+        
+        try:
+            self._dispatch_bulk(rows, scan_types, priority)
+            
+            logger.info(f"Initiated {len(scan_ids)} scans")
+            return scan_ids
+        
+        except Exception as e:
+            logger.error(f"Failed to initiate scans: {str(e)}")
+            self.db.execute(self._mark_failed(*scan_ids))
+            self.db.commit()
+            raise
+    
     async def get_scan_status(self, scan_id: str) -> Dict:
         """
         Gets the current status of a scan.
         
         Args:
             scan_id: The ID of the scan to check
-            
+        
         Returns:
             Dict containing scan status and results if complete
         """
-        scan_result = await self.db.query(ScanResults).filter(
-            ScanResults.scan_id == scan_id
-        ).first()
+        result = await self.db.execute(self._select_scan_status(scan_id))
+        response = self._status_response(scan_id, result.first())
+        await self.attach_mapped_findings(scan_id, response["findings"])
+        return response
+    
+    def get_scan_status_sync(self, scan_id: str) -> Dict:
+        """Synchronous counterpart of get_scan_status."""
+        result = self.db.execute(self._select_scan_status(scan_id))
+        response = self._status_response(scan_id, result.first())
+        self.attach_mapped_findings_sync(scan_id, response["findings"])
+        return response
+    
+    async def attach_mapped_findings(self, scan_id: str, findings: Optional[Dict]) -> None:
+        """
+        Puts a scan's mapped SAST findings back into its findings.
         
-        if not scan_result:
-            raise ValueError(f"Scan {scan_id} not found")
+        They are stored as scan_findings rows rather than in the findings
+        JSON; responses have them under findings["sast"]["mapped_findings"].
         
-        return {
-            "scan_id": scan_id,
-            "status": scan_result.status,
-            "findings": scan_result.findings,
-            "compliance_score": scan_result.compliance_score,
-            "scan_date": scan_result.scan_date,
-            "repository_url": scan_result.repository_url,
-            "branch": scan_result.branch
-        }
+        Args:
+            scan_id: The ID of the scan
+            findings: The scan's findings, updated in place
+        """
+        if findings and "sast" in findings:
+            result = await self.db.execute(self._select_mapped_findings(scan_id))
+            findings["sast"]["mapped_findings"] = [dict(row._mapping) for row in result]
+    
+    def attach_mapped_findings_sync(self, scan_id: str, findings: Optional[Dict]) -> None:
+        """Synchronous counterpart of attach_mapped_findings."""
+        if findings and "sast" in findings:
+            result = self.db.execute(self._select_mapped_findings(scan_id))
+            findings["sast"]["mapped_findings"] = [dict(row._mapping) for row in result]
     
     async def aggregate_results(self, scan_id: str) -> None:
         """
@@ -131,38 +209,142 @@ class ScanOrchestrator:
         Args:
             scan_id: The ID of the scan to aggregate results for
         """
-        scan_result = await self.db.query(ScanResults).filter(
-            ScanResults.scan_id == scan_id
-        ).first()
-        
-        if not scan_result or scan_result.status != "complete":
-            return
-        
-        # Calculate compliance score based on findings
-        total_issues = sum(len(findings) for findings in scan_result.findings.values())
-        severity_weights = {
-            "critical": 1.0,
-            "high": 0.8,
-            "medium": 0.5,
-            "low": 0.2
+        result = await self.db.execute(AGGREGATE_SCORE_SQL, {"scan_id": scan_id})
+        compliance_score = result.scalar_one_or_none()
+        await self.db.commit()
+        
+        if compliance_score is not None:
+            logger.info(f"Updated compliance score for scan {scan_id}: {compliance_score}%")
+    
+    def aggregate_results_sync(self, scan_id: str) -> None:
+        """Synchronous counterpart of aggregate_results."""
+        result = self.db.execute(AGGREGATE_SCORE_SQL, {"scan_id": scan_id})
+        compliance_score = result.scalar_one_or_none()
+        self.db.commit()
+        
+        if compliance_score is not None:
+            logger.info(f"Updated compliance score for scan {scan_id}: {compliance_score}%")
+    
+    def _new_scan_record(self, repository_url: str, branch: str, framework_id: int) -> ScanResult:
+        """Build a scan record already marked in progress so it is written once"""
+        return ScanResult(**self._new_scan_row(repository_url, branch, framework_id))
+    
+    @staticmethod
+    def _new_scan_row(repository_url: str, branch: str, framework_id: int) -> Dict:
+        return {
+            "scan_id": uuid.uuid4().hex,
+            "framework_id": framework_id,
+            "repository_url": repository_url,
+            "branch": branch,
+            # scan_date is a naive timestamp holding UTC
+            "scan_date": datetime.now(timezone.utc).replace(tzinfo=None),
+            "status": "in_progress",
+            "findings": {},
+            "compliance_score": 0.0,
+            "raw_output": {}
         }
+    
+    def _dispatch_scans(
+        self,
+        scan_id: str,
+        repository_url: str,
+        branch: str,
+        scan_types: List[str],
+        priority: int
+    ) -> None:
+        """Queue the requested scan types as one chord that completes the scan"""
+        scan_chord = self._scan_chord(scan_id, repository_url, branch, scan_types)
+        if scan_chord is not None:
+            scan_chord.apply_async(priority=priority)
+    
+    def _dispatch_bulk(self, rows: List[Dict], scan_types: List[str], priority: int) -> None:
+        """Queue every scan's chord in one group publish"""
+        scan_chords = [
+            scan_chord
+            for row in rows
+            if (scan_chord := self._scan_chord(row["scan_id"], row["repository_url"], row["branch"], scan_types)) is not None
+        ]
+        if scan_chords:
+            group(scan_chords).apply_async(priority=priority)
+    
+    @classmethod
+    def _scan_chord(cls, scan_id: str, repository_url: str, branch: str, scan_types: List[str]):
+        """
+        Build a scan's tasks as a chord whose callback completes and scores
+        the scan once every task succeeds, or marks it failed if one fails.
+        """
+        scan_tasks = cls._scan_signatures(scan_id, repository_url, branch, scan_types)
+        if not scan_tasks:
+            return None
         
-        weighted_score = 0
-        max_score = 0
+        callback = aggregate_scan_results.s(scan_id).on_error(mark_scan_failed.si(scan_id))
+        return chord(scan_tasks, callback)
+    
+    @staticmethod
+    def _scan_signatures(scan_id: str, repository_url: str, branch: str, scan_types: List[str]) -> List:
+        scan_tasks = []
         
-        for scan_type, findings in scan_result.findings.items():
-            for finding in findings:
-                severity = finding.get("severity", "low").lower()
-                weight = severity_weights.get(severity, 0.1)
-                weighted_score += weight
-                max_score += 1
+        if "sast" in scan_types:
+            scan_tasks.append(
+                run_sast_scan.si(scan_id, repository_url, branch).set(queue="sast")
+            )
         
-        if max_score > 0:
-            compliance_score = 100 * (1 - (weighted_score / max_score))
-        else:
-            compliance_score = 100
+        if "dast" in scan_types:
+            scan_tasks.append(
+                run_dast_scan.si(scan_id, repository_url).set(queue="dast")
+            )
         
-        scan_result.compliance_score = round(compliance_score, 2)
-        await self.db.commit()
+        if "sca" in scan_types:
+            scan_tasks.append(
+                run_sca_scan.si(scan_id, repository_url, branch).set(queue="sca")
+            )
         
-        logger.info(f"Updated compliance score for scan {scan_id}: {compliance_score}%")
+        return scan_tasks
+    
+    @staticmethod
+    def _select_scan_status(scan_id: str):
+        # Only the columns the status response needs; skips the raw_output blob
+        return select(
+            ScanResult.status,
+            ScanResult.findings,
+            ScanResult.compliance_score,
+            ScanResult.scan_date,
+            ScanResult.repository_url,
+            ScanResult.branch
+        ).where(ScanResult.scan_id == scan_id)
+    
+    @staticmethod
+    def _select_mapped_findings(scan_id: str):
+        return (
+            select(
+                ScanFinding.tool,
+                ScanFinding.finding,
+                ScanFinding.matches,
+                ScanFinding.controls
+            )
+            .where(ScanFinding.scan_id == scan_id)
+            .order_by(ScanFinding.id)
+        )
+    
+    @staticmethod
+    def _mark_failed(*scan_ids: str):
+        return (
+            update(ScanResult)
+            .where(ScanResult.scan_id.in_(scan_ids))
+            .values(status="failed")
+        )
+    
+    @staticmethod
+    def _status_response(scan_id: str, scan_result: Optional[Row]) -> Dict:
+        if not scan_result:
+            raise ValueError(f"Scan {scan_id} not found")
+        
+        return {
+            "scan_id": scan_id,
+            "status": scan_result.status,
+            "findings": scan_result.findings,
+            "compliance_score": scan_result.compliance_score,
+            "scan_date": scan_result.scan_date,
+            "repository_url": scan_result.repository_url,
+            "branch": scan_result.branch
+        }
@@ -0,0 +1,111 @@
+import gzip
+import hashlib
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import orjson
+
+from src.config import settings
+
+# Scanner JSON is highly repetitive; a low level already shrinks it several
+# times over without making the write CPU-bound
+COMPRESS_LEVEL = 3
+
+
+def _root() -> Path:
+    return Path(settings.raw_output_dir).expanduser()
+
+
+def store_raw_output(scan_id: str, key: str, raw_output: Any) -> Optional[Dict[str, Any]]:
+    """
+    Write one scan type's raw scanner output to the report store.
+    
+    Reports can run to tens of megabytes, so they are kept as compressed
+    files under RAW_OUTPUT_DIR instead of in Postgres, where every write
+    would go through WAL and TOAST. The pointer holds the path relative to
+    RAW_OUTPUT_DIR, so the API can load it wherever the shared volume is
+    mounted.
+    
+    Args:
+        scan_id: Unique identifier for the scan
+        key: Scan type the output belongs to, e.g. "sast"
+        raw_output: Raw scanner output
+    
+    Returns:
+        Pointer to the stored report, None if there was no output
+    """
+    if raw_output is None:
+        return None
+    
+    payload = gzip.compress(
+        orjson.dumps(raw_output, option=orjson.OPT_NON_STR_KEYS),
+        compresslevel=COMPRESS_LEVEL
+    )
+    
+    relative_path = f"{scan_id}/{key}.json.gz"
+    path = _root() / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Per-process temp name so a redelivered task never shares one
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(payload)
+    os.replace(tmp_path, path)
+    
+    return {
+        "path": relative_path,
+        "bytes": len(payload),
+        "sha256": hashlib.sha256(payload).hexdigest()
+    }
+
+
+def load_raw_output(pointer: Dict[str, Any]) -> Any:
+    """
+    Read a report written by store_raw_output.
+    
+    Args:
+        pointer: Pointer stored in ScanResult.raw_output
+    
+    Returns:
+        The raw scanner output
+    
+    Raises:
+        FileNotFoundError: The report was purged or never reached RAW_OUTPUT_DIR
+    """
+    payload = (_root() / pointer["path"]).read_bytes()
+    if hashlib.sha256(payload).hexdigest() != pointer["sha256"]:
+        raise ValueError(f"Raw output at {pointer['path']} does not match its checksum")
+    return orjson.loads(gzip.decompress(payload))
+
+
+def load_raw_outputs(pointers: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Read every report a scan's raw_output column points to.
+    
+    Args:
+        pointers: ScanResult.raw_output, mapping scan types to pointers
+    
+    Returns:
+        Dict mapping each scan type to its raw output, None where it had no
+        output or the report was purged
+    """
+    raw_outputs = {}
+    for key, pointer in (pointers or {}).items():
+        try:
+            raw_outputs[key] = load_raw_output(pointer) if pointer else None
+        except FileNotFoundError:
+            raw_outputs[key] = None
+    return raw_outputs
+
+
+def delete_raw_output(scan_id: str) -> None:
+    """Delete every report stored for a scan"""
+    shutil.rmtree(_root() / scan_id, ignore_errors=True)
+
+
+def stored_scan_ids() -> List[str]:
+    """IDs of the scans that have reports in the store"""
+    root = _root()
+    if not root.is_dir():
+        return []
+    return [entry.name for entry in root.iterdir() if entry.is_dir()]
@@ -1,17 +1,113 @@
-from typing import Dict, List, Any, Optional, cast
+from typing import Dict, List, Any, Optional, Tuple, Union, cast
+from datetime import datetime
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
 from pathlib import Path
+import orjson
 import yaml
-import json
-from sqlalchemy.orm import Session
-from sqlalchemy import Column
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only, selectinload
+from sqlalchemy import Column, select
 
+from src.config import settings
 from src.db.postgres.models import Framework, Control
 from src.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# libyaml's C emitter when PyYAML was built with it
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# sha256 of the last payload written to each rules file
+_written_hashes: Dict[Path, bytes] = {}
+
+
+def _write_if_changed(path: Path, payload: bytes) -> None:
+    """Atomically replace path with payload, skipping the write if unchanged"""
+    digest = hashlib.sha256(payload).digest()
+    if _written_hashes.get(path) == digest and path.exists():
+        return
+    
+    if not path.exists() or hashlib.sha256(path.read_bytes()).digest() != digest:
+        # Per-process temp name so concurrent workers never share one
+        tmp_path = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(payload)
+        os.replace(tmp_path, path)
+    
+    _written_hashes[path] = digest
+
+
+# (category keyword, Bandit test type, scanner patterns), first match wins
+_CATEGORY_TABLE = (
+    ("injection", "blacklist", ("exec(", "eval(", "subprocess.run(", "os.system(")),
+    ("authentication", "auth", ("password", "secret", "token", "api_key")),
+    ("crypto", "crypto", ("md5", "sha1", "random.random(", "math.random(")),
+    ("access control", "misc", ("chmod(", "os.chmod(", "permission", "privilege")),
+)
+
+
+def _categorize(category: Optional[str]) -> Tuple[str, Tuple[str, ...]]:
+    """Return the Bandit test type and base patterns for a control category"""
+    category = (category or "").lower()
+    for keyword, test_type, patterns in _CATEGORY_TABLE:
+        if keyword in category:
+            return test_type, patterns
+    return "misc", ()
+
+
+def _version_tag(last_updated: Optional[datetime]) -> Optional[str]:
+    """A framework's last_updated in the form stored with its rules"""
+    return last_updated.isoformat() if last_updated is not None else None
+
+
+# Entries kept by each module-level cache; well above the number of
+# frameworks, so only versions superseded by an edit are evicted
+RULES_CACHE_SIZE = 64
+
+
+class _LRUCache(OrderedDict):
+    """Dict holding at most maxsize entries, evicting the least recently used"""
+    
+    def __init__(self, maxsize: int):
+        super().__init__()
+        self.maxsize = maxsize
+    
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+    
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
+# Generated rules keyed by (framework_id, Framework.last_updated), which
+# moves whenever the framework or one of its controls changes
+_rules_cache: Dict[Tuple[int, Optional[datetime]], Dict[str, Any]] = _LRUCache(RULES_CACHE_SIZE)
+
+# Per framework_id, the cache key last read from the database and when
+# (monotonic clock)
+_confirmed_keys: Dict[int, Tuple[float, Tuple[int, Optional[datetime]]]] = _LRUCache(RULES_CACHE_SIZE)
+
+
 class RulesManager:
-    def __init__(self, db: Session):
+    """
+    Generates scanner rules from framework controls.
+    
+    The plain methods run on a sync Session (Celery workers); the ``*_async``
+    variants do the same on an AsyncSession for the API. Workers may use
+    rules up to RULES_VERSION_TTL_SECONDS older than the framework, while
+    the API always checks the framework's current version.
+    """
+    
+    def __init__(self, db: Union[Session, AsyncSession]):
         self.db = db
         self.rules_dir = Path(__file__).parent / "rules"
         self.rules_dir.mkdir(exist_ok=True)
@@ -26,27 +122,106 @@ class RulesManager:
         Returns:
             Dict containing Bandit and Semgrep rules
         """
-        framework = self.db.query(Framework).filter(
-            Framework.id == framework_id
-        ).first()
+        # Workers ask for the same few frameworks on every scan; within the
+        # TTL the last confirmed version is trusted without a query
+        confirmed = _confirmed_keys.get(framework_id)
+        if confirmed and time.monotonic() - confirmed[0] < settings.rules_version_ttl_seconds:
+            cached = _rules_cache.get(confirmed[1])
+            if cached is not None:
+                return cached
+        
+        # Rules only change when the framework does, so reuse the last
+        # build unless last_updated has moved
+        version = self.db.execute(self._select_version(framework_id)).one_or_none()
+        cache_key = self._cache_key(framework_id, version)
+        _confirmed_keys[framework_id] = (time.monotonic(), cache_key)
+        cached = _rules_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        framework = self.db.execute(self._select_framework(framework_id)).scalar_one_or_none()
+        rules = self._build_rules(framework_id, framework)
+        self._save_rules(rules)
+        _rules_cache[cache_key] = rules
+        return rules
+    
+    async def get_framework_rules_async(self, framework_id: int) -> Dict[str, Any]:
+        """Async counterpart of get_framework_rules."""
+        version = (await self.db.execute(self._select_version(framework_id))).one_or_none()
+        cache_key = self._cache_key(framework_id, version)
+        cached = _rules_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        result = await self.db.execute(self._select_framework(framework_id))
+        rules = self._build_rules(framework_id, result.scalar_one_or_none())
+        # Serializing and writing the rule files would otherwise stall the event loop
+        await asyncio.to_thread(self._save_rules, rules)
+        _rules_cache[cache_key] = rules
+        return rules
+    
+    async def get_rules_version_async(self, framework_id: int) -> Optional[str]:
+        """
+        Get the version current rules for a framework must carry.
         
+        Args:
+            framework_id: ID of the framework
+            
+        Returns:
+            The framework's last_updated, as in the rules' "version" key
+        """
+        version = (await self.db.execute(self._select_version(framework_id))).one_or_none()
+        return _version_tag(self._cache_key(framework_id, version)[1])
+    
+    @staticmethod
+    def _select_version(framework_id: int):
+        return select(Framework.last_updated).where(Framework.id == framework_id)
+    
+    @staticmethod
+    def _select_framework(framework_id: int):
+        # Load the framework together with its controls
+        return select(Framework).options(
+            selectinload(Framework.controls)
+        ).where(Framework.id == framework_id)
+    
+    @staticmethod
+    def _cache_key(framework_id: int, version) -> Tuple[int, Optional[datetime]]:
+        if version is None:
+            raise ValueError(f"Framework with ID {framework_id} not found")
+        return (framework_id, version.last_updated)
+    
+    def _build_rules(self, framework_id: int, framework: Optional[Framework]) -> Dict[str, Any]:
+        """Generate the rules for a loaded framework"""
         if not framework:
             raise ValueError(f"Framework with ID {framework_id} not found")
             
-        # Get framework controls
-        controls = self.db.query(Control).filter(
-            Control.framework_id == framework_id
-        ).all()
+        controls = framework.controls
         
         # Generate rules for each scanner
         bandit_rules = self._generate_bandit_rules(framework, controls)
         semgrep_rules = self._generate_semgrep_rules(framework, controls)
         
-        return {
+        rules = {
             "bandit": bandit_rules,
             "semgrep": semgrep_rules,
-            "framework_name": framework.name
+            "framework_name": framework.name,
+            # Travels with the rules wherever they are cached, so a copy
+            # can be checked against the framework
+            "version": _version_tag(framework.last_updated)
         }
+        return rules
+    
+    def _save_rules(self, rules: Dict[str, Any]) -> None:
+        """Write a framework's Bandit and Semgrep rule files"""
+        fname = rules["framework_name"].lower()
+        _write_if_changed(
+            self.rules_dir / f"bandit_{fname}.json",
+            orjson.dumps(rules["bandit"], option=orjson.OPT_INDENT_2)
+        )
+        _write_if_changed(
+            self.rules_dir / f"semgrep_{fname}.yaml",
+            yaml.dump(rules["semgrep"], Dumper=YAML_DUMPER).encode()
+        )
     
     def _generate_bandit_rules(
         self,
@@ -54,27 +229,23 @@ class RulesManager:
         controls: List[Control]
     ) -> Dict[str, Any]:
         """Generate Bandit rules from framework controls"""
+        fname = framework.name.lower()
+        include: List[str] = []
         rules = {
             "profiles": {
-                framework.name.lower(): {
-                    "include": []
+                fname: {
+                    "include": include
                 }
             },
             "custom_rules": {}
         }
         
+        prefix = f"{fname}_"
         for control in controls:
-            rule_id = f"{framework.name.lower()}_{control.control_id}"
+            rule_id = prefix + control.control_id
             
             # Map control categories to Bandit test types
-            if "injection" in control.category.lower():
-                test_type = "blacklist"
-            elif "authentication" in control.category.lower():
-                test_type = "auth"
-            elif "crypto" in control.category.lower():
-                test_type = "crypto"
-            else:
-                test_type = "misc"
+            test_type, category_patterns = _categorize(control.category)
             
             rule = {
                 "id": rule_id,
@@ -82,17 +253,12 @@ class RulesManager:
                 "type": test_type,
                 "severity": str(control.severity).lower() if control.severity is not None else "medium",
                 "description": control.description,
-                "patterns": self._extract_patterns(control)
+                "patterns": self._extract_patterns(control, category_patterns)
             }
             
             rules["custom_rules"][rule_id] = rule
-            rules["profiles"][framework.name.lower()]["include"].append(rule_id)
+            include.append(rule_id)
         
-        # Save rules to file
-        rules_file = self.rules_dir / f"bandit_{framework.name.lower()}.json"
-        with open(rules_file, 'w') as f:
-            json.dump(rules, f, indent=2)
-            
         return rules
     
     def _generate_semgrep_rules(
@@ -101,12 +267,14 @@ class RulesManager:
         controls: List[Control]
     ) -> Dict[str, Any]:
         """Generate Semgrep rules from framework controls"""
+        fname = framework.name.lower()
         rules = {
             "rules": []
         }
         
+        prefix = f"{fname}-"
         for control in controls:
-            rule_id = f"{framework.name.lower()}-{control.control_id}"
+            rule_id = prefix + control.control_id
             
             # Convert control requirements into Semgrep patterns
             patterns = self._extract_patterns(control)
@@ -125,65 +293,39 @@ class RulesManager:
             
             rules["rules"].append(rule)
         
-        # Save rules to file
-        rules_file = self.rules_dir / f"semgrep_{framework.name.lower()}.yaml"
-        with open(rules_file, 'w') as f:
-            yaml.safe_dump(rules, f)
-            
         return rules
     
-    def _extract_patterns(self, control: Control) -> List[str]:
-        """Extract patterns from control description and criteria"""
-        patterns = []
-        
+    def _extract_patterns(
+        self,
+        control: Control,
+        category_patterns: Optional[Tuple[str, ...]] = None
+    ) -> List[str]:
+        """Extract scanner patterns for a control from its category"""
         # Common security patterns based on control category
-        if control.category is not None:
-            category = control.category.lower()
-            
-            if "injection" in category:
-                patterns.extend([
-                    "exec(",
-                    "eval(",
-                    "subprocess.run(",
-                    "os.system(",
-                ])
-            elif "authentication" in category:
-                patterns.extend([
-                    "password",
-                    "secret",
-                    "token",
-                    "api_key",
-                ])
-            elif "crypto" in category:
-                patterns.extend([
-                    "md5",
-                    "sha1",
-                    "random.random(",
-                    "math.random(",
-                ])
-            elif "access control" in category:
-                patterns.extend([
-                    "chmod(",
-                    "os.chmod(",
-                    "permission",
-                    "privilege",
-                ])
-        
-        # Add patterns from validation criteria if available
-        if hasattr(control, 'validation_criteria') and control.validation_criteria:
-            try:
-                criteria = json.loads(control.validation_criteria)
-                if isinstance(criteria, dict):
-                    patterns.extend(criteria.get('patterns', []))
-            except json.JSONDecodeError:
-                pass
+        if category_patterns is None:
+            _, category_patterns = _categorize(control.category)
+        patterns = list(category_patterns)
         
         return patterns
 
     def get_available_frameworks(self) -> List[Dict[str, Any]]:
         """Get list of available frameworks with their rules"""
-        frameworks = self.db.query(Framework).all()
-        
+        frameworks = self.db.execute(self._select_frameworks()).scalars().all()
+        return self._framework_listing(frameworks)
+    
+    async def get_available_frameworks_async(self) -> List[Dict[str, Any]]:
+        """Async counterpart of get_available_frameworks."""
+        result = await self.db.execute(self._select_frameworks())
+        return self._framework_listing(result.scalars().all())
+    
+    @staticmethod
+    def _select_frameworks():
+        # Only the listed columns; controls are never needed here
+        return select(Framework).options(
+            load_only(Framework.id, Framework.name, Framework.version, Framework.description)
+        )
+    
+    def _framework_listing(self, frameworks: List[Framework]) -> List[Dict[str, Any]]:
         return [{
             "id": fw.id,
             "name": fw.name,
@@ -194,8 +336,9 @@ class RulesManager:
     
     def _check_rules_status(self, framework: Framework) -> Dict[str, bool]:
         """Check if rules files exist for a framework"""
-        bandit_rules = self.rules_dir / f"bandit_{framework.name.lower()}.json"
-        semgrep_rules = self.rules_dir / f"semgrep_{framework.name.lower()}.yaml"
+        fname = framework.name.lower()
+        bandit_rules = self.rules_dir / f"bandit_{fname}.json"
+        semgrep_rules = self.rules_dir / f"semgrep_{fname}.yaml"
         
         return {
             "bandit": bandit_rules.exists(),
@@ -0,0 +1,47 @@
+"""
+Compliance scoring of completed scans.
+
+Kept apart from the orchestrator, which pulls in every scan task, so the
+scoring SQL can be used and tested on its own.
+"""
+
+from sqlalchemy import text
+
+SEVERITY_WEIGHTS = {
+    "critical": 1.0,
+    "high": 0.8,
+    "medium": 0.5,
+    "low": 0.2
+}
+
+_SEVERITY_WHEN_SQL = " ".join(
+    f"WHEN '{severity}' THEN {weight}" for severity, weight in SEVERITY_WEIGHTS.items()
+)
+
+# Score a completed scan inside Postgres so the findings JSONB never leaves
+# the server. Findings are stored per scan type and tool, e.g.
+# {"sast": {"bandit": {"issues": [...]}}, "sca": {"dependency_check":
+# {"vulnerabilities": [...]}}}; every issue and vulnerability is weighted by
+# severity (missing severity counts as low, unknown as 0.1). Summary values
+# beside them are not findings, and a scan with no findings scores 100.
+AGGREGATE_SCORE_SQL = text(f"""
+    UPDATE scan_results
+    SET compliance_score = (
+        SELECT round((100 * (1 - coalesce(
+            sum(
+                CASE lower(coalesce(finding->>'severity', 'low'))
+                    {_SEVERITY_WHEN_SQL}
+                    ELSE 0.1
+                END
+            ) / nullif(count(*), 0),
+            0
+        )))::numeric, 2)
+        FROM (
+            SELECT jsonb_path_query(scan_results.findings, '$.*.*.issues[*]')
+            UNION ALL
+            SELECT jsonb_path_query(scan_results.findings, '$.*.*.vulnerabilities[*]')
+        ) AS scan_finding(finding)
+    )
+    WHERE scan_id = :scan_id AND status = 'complete'
+    RETURNING compliance_score
+""")
@@ -1,18 +1,26 @@
 from fastapi import UploadFile, HTTPException
 from pathlib import Path
+import asyncio
 import tempfile
 import shutil
 import zipfile
 import tarfile
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any
 import os
 
 from src.core.logging import get_logger
-from src.services.scanning.orchestrator import ScanOrchestrator
-from src.db.session import get_db
+from src.db.session import AsyncSessionLocal
 
 logger = get_logger(__name__)
 
+# Read/write size for archive I/O
+COPY_BUFSIZE = 1 << 20
+
+# Extractions running at once per process; each already uses every core
+# for ZIP members, so more would only contend
+EXTRACT_SEMAPHORE = asyncio.Semaphore(2)
+
 class CodeUploadHandler:
     def __init__(self):
         self.temp_dir = None
@@ -35,48 +43,27 @@ class CodeUploadHandler:
             Dict containing scan_id and status
         """
         try:
-            # Create temporary directory
-            self.temp_dir = tempfile.mkdtemp(prefix="scan_")
-            
-            # Get file extension
-            file_ext = Path(file.filename).suffix.lower()
-            
-            # Save uploaded file
-            temp_file = Path(self.temp_dir) / file.filename
-            with temp_file.open("wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            
-            # Extract files
-            extract_dir = Path(self.temp_dir) / "code"
-            extract_dir.mkdir()
-            
-            if file_ext == ".zip":
-                with zipfile.ZipFile(temp_file, 'r') as zip_ref:
-                    zip_ref.extractall(extract_dir)
-            elif file_ext in [".tar", ".gz", ".tgz"]:
-                with tarfile.open(temp_file, 'r:*') as tar_ref:
-                    tar_ref.extractall(extract_dir)
-            else:
-                raise HTTPException(
-                    status_code=400,
-                    detail="Unsupported file format. Please upload ZIP or TAR archives."
-                )
-            
-            # Initialize scan
-            db = next(get_db())
-            orchestrator = ScanOrchestrator(db)
+            # Extraction is blocking I/O and decompression, so it runs in a
+            # worker thread and the event loop keeps serving requests
+            async with EXTRACT_SEMAPHORE:
+                extract_dir = await asyncio.to_thread(self._extract_upload, file)
             
             # Create a virtual repository URL for local files
             virtual_repo_url = f"file://{extract_dir}"
             
-            # Start SAST scan
-            scan_id = await orchestrator.initiate_scan(
-                repository_url=virtual_repo_url,
-                branch="main",  # Default for uploaded files
-                framework_id=framework_id,
-                scan_types=["sast"],  # Only SAST for now
-                priority=5
-            )
+            # Imported here so extraction does not pull in every scan task
+            from src.services.scanning.orchestrator import ScanOrchestrator
+            
+            # Initialize and start SAST scan
+            async with AsyncSessionLocal() as db:
+                orchestrator = ScanOrchestrator(db)
+                scan_id = await orchestrator.initiate_scan(
+                    repository_url=virtual_repo_url,
+                    branch="main",  # Default for uploaded files
+                    framework_id=framework_id,
+                    scan_types=["sast"],  # Only SAST for now
+                    priority=5
+                )
             
             return {
                 "scan_id": scan_id,
@@ -92,6 +79,98 @@ class CodeUploadHandler:
             # Cleanup will be handled by cleanup_worker
             pass
     
+    def _extract_upload(self, file: UploadFile) -> Path:
+        """
+        Extract an uploaded archive into a new temporary directory.
+        
+        Args:
+            file: Uploaded file (ZIP or TAR)
+            
+        Returns:
+            Directory holding the extracted code
+        """
+        # Create temporary directory
+        self.temp_dir = tempfile.mkdtemp(prefix="scan_")
+        
+        # Get file extension
+        file_ext = Path(file.filename).suffix.lower()
+        
+        # Extract files straight from the upload's spooled file rather
+        # than copying the archive to disk and reading it back
+        extract_dir = Path(self.temp_dir) / "code"
+        extract_dir.mkdir()
+        
+        if file_ext == ".zip":
+            with zipfile.ZipFile(file.file, 'r') as zip_ref:
+                self._extract_zip(zip_ref, extract_dir)
+        elif file_ext in [".tar", ".gz", ".tgz"]:
+            # Stream mode: members are extracted as the archive is read
+            with tarfile.open(fileobj=file.file, mode='r|*', bufsize=COPY_BUFSIZE) as tar_ref:
+                self._extract_tar(tar_ref, extract_dir)
+        else:
+            raise HTTPException(
+                status_code=400,
+                detail="Unsupported file format. Please upload ZIP or TAR archives."
+            )
+        
+        return extract_dir
+    
+    def _extract_zip(self, zip_ref: zipfile.ZipFile, extract_dir: Path) -> None:
+        """
+        Extract a ZIP archive with its members decompressed in parallel.
+        
+        Every member is an independent DEFLATE stream and zlib releases the
+        GIL while inflating, so threads decompress on all cores.
+        """
+        root = extract_dir.resolve()
+        files = []
+        for info in zip_ref.infolist():
+            target = (root / info.filename).resolve()
+            # Writing members by hand skips extractall's name sanitizing,
+            # so refuse anything that would land outside the directory
+            if not target.is_relative_to(root):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Archive member {info.filename} escapes the extraction directory"
+                )
+            if info.is_dir():
+                target.mkdir(parents=True, exist_ok=True)
+            else:
+                # Created here so workers never race to make directories
+                target.parent.mkdir(parents=True, exist_ok=True)
+                files.append((info, target))
+        
+        def extract(member):
+            info, target = member
+            with zip_ref.open(info) as src, target.open("wb") as dst:
+                shutil.copyfileobj(src, dst, COPY_BUFSIZE)
+        
+        with ThreadPoolExecutor(max_workers=min(32, os.cpu_count() or 1)) as executor:
+            # list() re-raises the first extraction error
+            list(executor.map(extract, files))
+    
+    def _extract_tar(self, tar_ref: tarfile.TarFile, extract_dir: Path) -> None:
+        """
+        Extract a streamed tar archive, refusing members that escape extract_dir.
+        
+        Links, device files and paths outside the directory are rejected up
+        front; tarfile's own "data" filter is applied as well where the
+        running Python has it.
+        """
+        root = extract_dir.resolve()
+        filter_kwargs = {"filter": "data"} if hasattr(tarfile, "data_filter") else {}
+        for member in tar_ref:
+            target = (root / member.name).resolve()
+            escapes = not target.is_relative_to(root)
+            if escapes or not (member.isfile() or member.isdir()):
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unsafe archive member {member.name}"
+                )
+            # Members come straight off the stream, so each is extracted as
+            # soon as it is read
+            tar_ref.extract(member, root, set_attrs=False, **filter_kwargs)
+    
     def cleanup(self):
         """Clean up temporary files"""
         if self.temp_dir and os.path.exists(self.temp_dir):
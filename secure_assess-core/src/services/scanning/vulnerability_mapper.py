@@ -1,15 +1,41 @@
-from typing import Dict, List, Any
+from typing import Dict, Iterable, List, Any, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, select
 
 from src.db.postgres.models import Vulnerability, Control
 from src.core.logging import get_logger
 
 logger = get_logger(__name__)
 
+# (issue type keyword, description keyword, vulnerability search pattern)
+# for Bandit findings, first match wins
+_BANDIT_PATTERNS = (
+    ("sql", "sql", "SQL injection"),
+    ("command", "subprocess", "Command injection"),
+    ("crypto", "random", "Cryptographic issues"),
+    ("password", "secret", "Credential exposure"),
+)
+
+# Search term pairs resolved per candidate query, keeping its select list
+# well below Postgres' column limit
+SEARCH_BATCH_SIZE = 100
+
 class VulnerabilityMapper:
+    """
+    Maps scanner findings to known vulnerabilities and controls.
+    
+    Reference data is cached on the instance, so a mapper is meant to live
+    for one scan: findings of a scan repeat the same search terms and
+    vulnerabilities many times over.
+    """
+    
     def __init__(self, db: Session):
         self.db = db
+        self._candidates: Dict[Tuple[str, str], List[Vulnerability]] = {}
+        self._controls: Optional[List[Control]] = None
+        self._control_matches: Dict[int, List[Dict[str, Any]]] = {}
+        # Matches per (tool, type or rule id, description or message, severity)
+        self._finding_matches: Dict[Tuple[str, str, str, Optional[str]], List[Dict[str, Any]]] = {}
         
     def map_bandit_finding(self, finding: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
@@ -21,37 +47,33 @@ class VulnerabilityMapper:
         Returns:
             List of matched vulnerabilities with confidence scores
         """
-        matches = []
-        
         # Extract key information from finding
         issue_type = finding.get("type", "")
         description = finding.get("description", "")
-        severity = finding.get("severity", "LOW").upper()
         
-        # Common vulnerability patterns
-        if "sql" in issue_type.lower() or "sql" in description.lower():
-            pattern = "SQL injection"
-        elif "command" in issue_type.lower() or "subprocess" in description.lower():
-            pattern = "Command injection"
-        elif "crypto" in issue_type.lower() or "random" in description.lower():
-            pattern = "Cryptographic issues"
-        elif "password" in issue_type.lower() or "secret" in description.lower():
-            pattern = "Credential exposure"
-        else:
-            pattern = issue_type
+        # The same issue recurs across files; its matches depend only on
+        # these fields
+        memo_key = ("bandit", issue_type, description, finding.get("severity"))
+        memoized = self._finding_matches.get(memo_key)
+        if memoized is not None:
+            return memoized
+        
+        matches = []
+        severity = finding.get("severity", "LOW").upper()
+        # Normalized once per finding rather than per candidate vulnerability
+        issue_key = issue_type.lower()
+        description_words = description.lower().split()
+        match_severity = severity if "severity" in finding else None
             
         # Search for matching vulnerabilities
-        vulnerabilities = self.db.query(Vulnerability).filter(
-            or_(
-                Vulnerability.title.ilike(f"%{pattern}%"),
-                Vulnerability.description.ilike(f"%{pattern}%")
-            )
-        ).all()
+        vulnerabilities = self._search_vulnerabilities(*self._bandit_search_terms(finding))
         
         for vuln in vulnerabilities:
             # Calculate confidence score based on similarity
             confidence = self._calculate_confidence(
-                finding=finding,
+                key=issue_key,
+                words=description_words,
+                severity=match_severity,
                 vulnerability=vuln
             )
             
@@ -63,6 +85,7 @@ class VulnerabilityMapper:
                     "severity": severity
                 })
         
+        self._finding_matches[memo_key] = matches
         return matches
     
     def map_semgrep_finding(self, finding: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -75,27 +98,34 @@ class VulnerabilityMapper:
         Returns:
             List of matched vulnerabilities with confidence scores
         """
-        matches = []
-        
         # Extract key information from finding
         rule_id = finding.get("rule_id", "")
         message = finding.get("message", "")
+        
+        # The same rule fires across files; its matches depend only on
+        # these fields
+        memo_key = ("semgrep", rule_id, message, finding.get("severity"))
+        memoized = self._finding_matches.get(memo_key)
+        if memoized is not None:
+            return memoized
+        
+        matches = []
         severity = finding.get("severity", "LOW").upper()
+        # Normalized once per finding rather than per candidate vulnerability
+        rule_key = rule_id.lower()
+        message_words = message.lower().split()
+        match_severity = severity if "severity" in finding else None
         
         # Search for matching vulnerabilities
-        vulnerabilities = self.db.query(Vulnerability).filter(
-            or_(
-                Vulnerability.title.ilike(f"%{rule_id}%"),
-                Vulnerability.description.ilike(f"%{message}%")
-            )
-        ).all()
+        vulnerabilities = self._search_vulnerabilities(*self._semgrep_search_terms(finding))
         
         for vuln in vulnerabilities:
             # Calculate confidence score
             confidence = self._calculate_confidence(
-                finding=finding,
-                vulnerability=vuln,
-                is_semgrep=True
+                key=rule_key,
+                words=message_words,
+                severity=match_severity,
+                vulnerability=vuln
             )
             
             if confidence > 0.5:
@@ -106,8 +136,53 @@ class VulnerabilityMapper:
                     "severity": severity
                 })
         
+        self._finding_matches[memo_key] = matches
         return matches
     
+    def map_bandit_findings(self, findings: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        Map a batch of Bandit findings to known vulnerabilities.
+        
+        Candidates for every distinct search are fetched up front in as few
+        queries as possible, instead of one query per search.
+        
+        Args:
+            findings: Findings from Bandit scanner
+            
+        Returns:
+            Matches for each finding, in the same order
+        """
+        self._prefetch_candidates(self._bandit_search_terms(finding) for finding in findings)
+        return [self.map_bandit_finding(finding) for finding in findings]
+    
+    def map_semgrep_findings(self, findings: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """
+        Map a batch of Semgrep findings to known vulnerabilities.
+        
+        Args:
+            findings: Findings from Semgrep scanner
+            
+        Returns:
+            Matches for each finding, in the same order
+        """
+        self._prefetch_candidates(self._semgrep_search_terms(finding) for finding in findings)
+        return [self.map_semgrep_finding(finding) for finding in findings]
+    
+    def map_to_controls_bulk(self, vulnerability_ids: Iterable[int]) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        Map several vulnerabilities to relevant security controls.
+        
+        Args:
+            vulnerability_ids: IDs of the vulnerabilities
+            
+        Returns:
+            Dict mapping each vulnerability ID to its relevant controls
+        """
+        return {
+            vulnerability_id: self.map_to_controls(vulnerability_id)
+            for vulnerability_id in set(vulnerability_ids)
+        }
+    
     def map_to_controls(self, vulnerability_id: int) -> List[Dict[str, Any]]:
         """
         Map a vulnerability to relevant security controls.
@@ -118,16 +193,21 @@ class VulnerabilityMapper:
         Returns:
             List of relevant controls with confidence scores
         """
-        # Get the vulnerability
-        vulnerability = self.db.query(Vulnerability).filter(
-            Vulnerability.id == vulnerability_id
-        ).first()
+        cached = self._control_matches.get(vulnerability_id)
+        if cached is not None:
+            return cached
+        
+        # Get the vulnerability; usually already in the session's identity
+        # map from the search that matched it, so no query is issued
+        vulnerability = self.db.get(Vulnerability, vulnerability_id)
         
         if not vulnerability:
             return []
             
-        # Find relevant controls
-        controls = self.db.query(Control).all()
+        # Find relevant controls, loaded once per mapper
+        if self._controls is None:
+            self._controls = self.db.query(Control).all()
+        controls = self._controls
         matches = []
         
         for control in controls:
@@ -145,37 +225,103 @@ class VulnerabilityMapper:
                     "mitigation_advice": control.description
                 })
         
+        self._control_matches[vulnerability_id] = matches
         return matches
     
+    @staticmethod
+    def _bandit_search_terms(finding: Dict[str, Any]) -> Tuple[str, str]:
+        """Title and description search terms for a Bandit finding"""
+        issue_type = finding.get("type", "")
+        issue_key = issue_type.lower()
+        description_lower = finding.get("description", "").lower()
+        
+        # Common vulnerability patterns
+        pattern = next(
+            (
+                name for type_keyword, description_keyword, name in _BANDIT_PATTERNS
+                if type_keyword in issue_key or description_keyword in description_lower
+            ),
+            issue_type
+        )
+        return pattern, pattern
+    
+    @staticmethod
+    def _semgrep_search_terms(finding: Dict[str, Any]) -> Tuple[str, str]:
+        """Title and description search terms for a Semgrep finding"""
+        return finding.get("rule_id", ""), finding.get("message", "")
+    
+    @staticmethod
+    def _search_condition(title_term: str, description_term: str):
+        return or_(
+            Vulnerability.title.ilike(f"%{title_term}%"),
+            Vulnerability.description.ilike(f"%{description_term}%")
+        )
+    
+    def _search_vulnerabilities(self, title_term: str, description_term: str) -> List[Vulnerability]:
+        """Find vulnerabilities whose title or description contains a term, once per term pair"""
+        key = (title_term, description_term)
+        vulnerabilities = self._candidates.get(key)
+        if vulnerabilities is None:
+            vulnerabilities = self._candidates[key] = self.db.execute(
+                select(Vulnerability).where(self._search_condition(title_term, description_term))
+            ).scalars().all()
+        return vulnerabilities
+    
+    def _prefetch_candidates(self, keys: Iterable[Tuple[str, str]]) -> None:
+        """
+        Fill the candidate cache for many term pairs at once.
+        
+        Each query returns the union of the batch's candidates, along with
+        one flag per term pair telling which of them each row matched.
+        """
+        pending = [key for key in dict.fromkeys(keys) if key not in self._candidates]
+        for i in range(0, len(pending), SEARCH_BATCH_SIZE):
+            batch = pending[i:i + SEARCH_BATCH_SIZE]
+            conditions = [self._search_condition(*key) for key in batch]
+            rows = self.db.execute(
+                select(
+                    Vulnerability,
+                    *(condition.label(f"match_{j}") for j, condition in enumerate(conditions))
+                ).where(or_(*conditions))
+            ).all()
+            
+            for key in batch:
+                self._candidates[key] = []
+            for vulnerability, *flags in rows:
+                for key, matched in zip(batch, flags):
+                    if matched:
+                        self._candidates[key].append(vulnerability)
+    
     def _calculate_confidence(
         self,
-        finding: Dict[str, Any],
-        vulnerability: Vulnerability,
-        is_semgrep: bool = False
+        key: str,
+        words: List[str],
+        severity: Optional[str],
+        vulnerability: Vulnerability
     ) -> float:
-        """Calculate confidence score for a vulnerability match"""
+        """
+        Calculate confidence score for a vulnerability match.
+        
+        Args:
+            key: Lowercased Bandit issue type or Semgrep rule id
+            words: Lowercased words of the finding's description or message
+            severity: Uppercased finding severity, None if it had none
+            vulnerability: Candidate vulnerability
+            
+        Returns:
+            Confidence between 0 and 1
+        """
         confidence = 0.0
         
         # Basic text matching
-        if is_semgrep:
-            rule_id = finding.get("rule_id", "").lower()
-            message = finding.get("message", "").lower()
-            if rule_id in vulnerability.title.lower():
-                confidence += 0.4
-            if any(word in vulnerability.description.lower() 
-                  for word in message.split()):
-                confidence += 0.3
-        else:
-            issue_type = finding.get("type", "").lower()
-            description = finding.get("description", "").lower()
-            if issue_type in vulnerability.title.lower():
-                confidence += 0.4
-            if any(word in vulnerability.description.lower() 
-                  for word in description.split()):
-                confidence += 0.3
+        if key in vulnerability.title.lower():
+            confidence += 0.4
+        vuln_description = vulnerability.description.lower()
+        if any(word in vuln_description for word in words):
+            confidence += 0.3
                 
         # Severity matching
-        if finding.get("severity", "").upper() == vulnerability.severity:
+        if severity is not None and severity == vulnerability.severity:
             confidence += 0.3
             
         return min(confidence, 1.0)
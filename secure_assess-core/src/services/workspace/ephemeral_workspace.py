@@ -0,0 +1,26 @@
+import os
+import shutil
+from typing import Optional
+
+from src.config import settings
+
+RAM_DISK = "/dev/shm"
+
+def workspace_root() -> Optional[str]:
+    """
+    Pick the parent directory for scan workspaces.
+    
+    Prefers the tmpfs at /dev/shm so checkouts and the scanners' repeated
+    source reads stay in memory, as long as it has room for a workspace of
+    the configured maximum size.
+    
+    Returns:
+        Directory to pass as tempfile's dir=, or None for the default temp dir
+    """
+    if not (os.path.isdir(RAM_DISK) and os.access(RAM_DISK, os.W_OK)):
+        return None
+    
+    if shutil.disk_usage(RAM_DISK).free < settings.max_workspace_size_gb * 1024 ** 3:
+        return None
+    
+    return RAM_DISK
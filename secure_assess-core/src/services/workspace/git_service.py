@@ -0,0 +1,91 @@
+import hashlib
+import os
+from pathlib import Path
+from typing import Optional
+
+from git import Repo
+from git.exc import GitCommandError, InvalidGitRepositoryError
+
+from src.config import settings
+from src.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+SHALLOW_CLONE_OPTIONS = ["--depth=1", "--single-branch", "--no-tags"]
+
+# Borrow a local repository's objects through alternates instead of copying
+LOCAL_CLONE_OPTIONS = ["--shared", "--single-branch", "--no-tags"]
+
+# Fail fast instead of prompting for credentials
+GIT_ENV = {"GIT_TERMINAL_PROMPT": "0"}
+
+class GitService:
+    """
+    Checks repositories out for scanning.
+    
+    Each repository is kept as a bare, blob-less mirror under the cache
+    directory; a scan fetches the branch into it and checks the tip out as a
+    detached worktree, so re-scanning a repository only transfers new objects.
+    """
+    
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = Path(cache_dir or settings.repo_cache_dir).expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    def checkout(self, repository_url: str, branch: str, target_dir: str) -> None:
+        """
+        Check out the tip of a branch into target_dir.
+        
+        Args:
+            repository_url: URL of the repository
+            branch: Branch to check out
+            target_dir: Empty directory to populate
+        """
+        local_path = self._local_path(repository_url)
+        if local_path:
+            # Already on disk (e.g. a CI runner's checkout): nothing to fetch
+            # or cache, and the caller's repository is left untouched
+            logger.info(f"Checking out local repository {local_path}")
+            Repo.clone_from(local_path, target_dir, branch=branch, multi_options=LOCAL_CLONE_OPTIONS)
+            return
+        
+        try:
+            cache = self._update_cache(repository_url, branch)
+            cache.git.worktree("add", "--detach", target_dir, branch)
+        except (GitCommandError, InvalidGitRepositoryError) as e:
+            # A locked or corrupt mirror must not fail the scan
+            logger.warning(f"Repository cache unusable for {repository_url}, cloning directly: {str(e)}")
+            Repo.clone_from(
+                repository_url,
+                target_dir,
+                branch=branch,
+                multi_options=SHALLOW_CLONE_OPTIONS,
+                env=GIT_ENV
+            )
+    
+    @staticmethod
+    def _local_path(repository_url: str) -> Optional[str]:
+        """Return the directory a local repository URL points at, if any"""
+        path = repository_url[len("file://"):] if repository_url.startswith("file://") else repository_url
+        return os.path.realpath(path) if os.path.isdir(path) else None
+    
+    def _update_cache(self, repository_url: str, branch: str) -> Repo:
+        """Create or refresh the bare mirror for a repository"""
+        cache_path = self.cache_dir / f"{hashlib.sha1(repository_url.encode()).hexdigest()}.git"
+        
+        if not cache_path.exists():
+            logger.info(f"Caching {repository_url} in {cache_path}")
+            return Repo.clone_from(
+                repository_url,
+                cache_path,
+                bare=True,
+                multi_options=["--filter=blob:none", "--no-tags"],
+                env=GIT_ENV
+            )
+        
+        cache = Repo(cache_path)
+        # Drop worktrees whose scan directories have already been removed
+        cache.git.worktree("prune")
+        with cache.git.custom_environment(**GIT_ENV):
+            cache.git.fetch("origin", f"+refs/heads/{branch}:refs/heads/{branch}", "--no-tags")
+        return cache
@@ -0,0 +1,70 @@
+from typing import List
+from celery import Task
+from sqlalchemy import update
+from src.workers.celery_app import celery_app
+from src.db.session import ScopedSyncSession
+from src.db.postgres.models import ScanResult
+from src.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+class AggregateScanTask(Task):
+    @property
+    def db(self):
+        return ScopedSyncSession()
+
+@celery_app.task(bind=True, base=AggregateScanTask)
+def aggregate_scan_results(self, scan_results: List[dict], scan_id: str) -> None:
+    """
+    Completes a scan once all of its scan tasks have finished.
+    
+    Runs as the chord callback of a scan's tasks, so it fires exactly once,
+    after the last of them succeeds.
+    
+    Args:
+        scan_results: Return values of the scan tasks (unused; results are
+            read back from the database)
+        scan_id: Unique identifier for the scan
+    """
+    # Imported here: the orchestrator imports the worker modules
+    from src.services.scanning.orchestrator import ScanOrchestrator
+    
+    try:
+        self.db.execute(
+            update(ScanResult)
+            .where(ScanResult.scan_id == scan_id, ScanResult.status == "in_progress")
+            .values(status="complete")
+        )
+        # Scores the scan and commits the status change with it
+        ScanOrchestrator(self.db).aggregate_results_sync(scan_id)
+        
+        logger.info(f"Scan {scan_id} complete")
+    
+    except Exception as e:
+        logger.error(f"Aggregating scan {scan_id} failed: {str(e)}")
+        raise
+    
+    finally:
+        ScopedSyncSession.remove()
+
+@celery_app.task(bind=True, base=AggregateScanTask)
+def mark_scan_failed(self, scan_id: str) -> None:
+    """
+    Marks a scan failed when one of its scan tasks fails.
+    
+    Linked as the error callback of the chord, in place of aggregation.
+    
+    Args:
+        scan_id: Unique identifier for the scan
+    """
+    try:
+        self.db.execute(
+            update(ScanResult)
+            .where(ScanResult.scan_id == scan_id)
+            .values(status="failed")
+        )
+        self.db.commit()
+        logger.warning(f"Scan {scan_id} failed")
+    
+    finally:
+        ScopedSyncSession.remove()
@@ -0,0 +1,60 @@
+from typing import Any, Dict
+from celery import Task
+from sqlalchemy import func, literal, update
+from sqlalchemy.dialects.postgresql import JSONB
+
+from src.db.session import ScopedSyncSession
+from src.db.postgres.models import ScanResult
+from src.services.scanning.raw_output_store import store_raw_output
+
+
+class ScanTaskBase(Task):
+    """
+    Base for the scan tasks.
+    
+    Each scan type stores its results under its own key of the scan's
+    findings column, and a pointer to its stored raw output under the same
+    key of raw_output, through finalize.
+    """
+    
+    @property
+    def db(self):
+        # The session of the calling thread; an attribute on the task would
+        # be shared by every thread of a threads pool worker
+        return ScopedSyncSession()
+    
+    def finalize(self, scan_id: str, key: str, findings: Dict[str, Any], raw_output: Any) -> None:
+        """
+        Store one scan type's results on its scan record.
+        
+        Both JSONB columns are merged in place by a single UPDATE: the row
+        is never loaded, and scan types finishing at the same time do not
+        overwrite each other's keys.
+        
+        Args:
+            scan_id: Unique identifier for the scan
+            key: Scan type the results are stored under, e.g. "sast"
+            findings: Processed results
+            raw_output: Raw scanner output, written to the report store
+        """
+        raw_pointer = store_raw_output(scan_id, key, raw_output)
+        
+        empty = literal({}, JSONB)
+        self.db.execute(
+            update(ScanResult)
+            .where(ScanResult.scan_id == scan_id)
+            .values(
+                findings=func.coalesce(ScanResult.findings, empty).op("||")(
+                    literal({key: findings}, JSONB)
+                ),
+                raw_output=func.coalesce(ScanResult.raw_output, empty).op("||")(
+                    literal({key: raw_pointer}, JSONB)
+                )
+            )
+        )
+        self.db.commit()
+    
+    def after_return(self, *args, **kwargs) -> None:
+        # Runs on the task's thread however it ended; hands the connection
+        # back to the pool
+        ScopedSyncSession.remove()
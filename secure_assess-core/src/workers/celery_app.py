@@ -1,31 +1,61 @@
+import os
+import sys
+
+import orjson
 from celery import Celery
+from celery.signals import worker_process_init, worker_ready
 from src.config import get_settings
+from src.core.logging import get_logger
 
 settings = get_settings()
+logger = get_logger(__name__)
 
 # Initialize Celery app
 celery_app = Celery(
     "secure_assess",
-    broker=settings.CELERY_BROKER_URL,
-    backend=settings.CELERY_RESULT_BACKEND,
+    broker=settings.celery_broker_url,
+    backend=settings.celery_result_backend,
     include=[
         "src.workers.sast_worker",
         "src.workers.dast_worker",
         "src.workers.sca_worker",
+        "src.workers.aggregate_worker",
         "src.workers.cleanup_worker"
     ]
 )
 
+# Solo is only needed on Windows, where prefork is unsupported; elsewhere run
+# scans in parallel worker processes
+default_pool = "solo" if sys.platform.startswith("win") else "prefork"
+
 # Configure Celery
 celery_app.conf.update(
-    task_serializer="json",
-    accept_content=["json"],
-    result_serializer="json",
+    task_serializer="msgpack",
+    accept_content=["msgpack", "json"],  # json accepted while older producers drain
+    result_serializer="msgpack",
     timezone="UTC",
     enable_utc=True,
     task_track_started=True,
-    task_time_limit=3600,  # 1 hour timeout for tasks
+    task_time_limit=settings.task_time_limit_seconds,  # SCAN_TIMEOUT_MINUTES, 1 hour by default
+    # Raises SoftTimeLimitExceeded in the task first, so a wedged scan fails
+    # through its own error handling before the hard kill
+    task_soft_time_limit=settings.task_soft_time_limit_seconds,
     worker_prefetch_multiplier=1,  # Disable prefetching
+    task_acks_late=True,  # A scan lost with its worker is redelivered, not dropped
+    worker_max_tasks_per_child=200,  # Recycle processes before scanner memory creeps up
+    worker_max_memory_per_child=1048576,  # KiB; also recycle a prefork child past 1 GiB
+    broker_pool_limit=32,  # Reuse broker connections across publishes
+    broker_connection_retry_on_startup=True,
+    broker_transport_options={
+        "confirm_publish": True,
+        # Longer than task_time_limit, so a Redis broker never redelivers a
+        # task that is still running
+        "visibility_timeout": settings.task_time_limit_seconds + 600
+    },
+    worker_pool=settings.celery_pool or default_pool,
+    worker_concurrency=settings.celery_concurrency or os.cpu_count(),
+    # Light tasks (chord callbacks) that no route below claims
+    task_default_queue="default",
     task_routes={
         "src.workers.sast_worker.*": {"queue": "sast"},
         "src.workers.dast_worker.*": {"queue": "dast"},
@@ -38,5 +68,45 @@ celery_app.conf.update(
 celery_app.conf.task_queue_max_priority = 10
 celery_app.conf.task_default_priority = 5
 
+# Periodic maintenance, scheduled by `make run-beat`
+celery_app.conf.beat_schedule = {
+    "purge-raw-output": {
+        "task": "src.workers.cleanup_worker.purge_raw_output",
+        "schedule": settings.raw_output_purge_interval_minutes * 60
+    }
+}
+
+@worker_process_init.connect
+def reset_db_pool(**kwargs):
+    """Give each forked worker process its own connection pool"""
+    from src.db.session import sync_engine
+    
+    # Connections inherited from the parent are dropped without being
+    # closed, so the parent's sockets are never shut down from the child
+    sync_engine.dispose(close=False)
+
+@worker_ready.connect
+def warm_rules_cache(**kwargs):
+    """Generate every framework's rules once at startup and publish them to Redis"""
+    from src.db.redis.client import get_redis, rules_key
+    from src.db.session import SyncSessionLocal
+    from src.services.scanning.rules_manager import RulesManager
+    
+    redis_client = get_redis()
+    with SyncSessionLocal() as db:
+        rules_manager = RulesManager(db)
+        for framework in rules_manager.get_available_frameworks():
+            try:
+                rules = rules_manager.get_framework_rules(framework["id"])
+                redis_client.set(
+                    rules_key(framework["id"]),
+                    orjson.dumps(rules),
+                    ex=settings.redis_cache_ttl
+                )
+            except Exception as e:
+                logger.error(f"Failed to warm rules for framework {framework['id']}: {str(e)}")
+    
+    logger.info("Framework rules cache warmed")
+
 if __name__ == "__main__":
     celery_app.start()
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update
+from src.config import settings
+from src.workers.celery_app import celery_app
+from src.db.session import SyncSessionLocal
+from src.db.postgres.models import ScanResult
+from src.services.scanning.raw_output_store import delete_raw_output, stored_scan_ids
+from src.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Scan IDs looked up per query
+PURGE_BATCH_SIZE = 1000
+
+@celery_app.task
+def purge_raw_output() -> int:
+    """
+    Deletes stored raw output no scan should keep.
+    
+    A scan's reports go once it is older than RAW_OUTPUT_RETENTION_DAYS,
+    along with its pointers to them. Reports of scans whose record was
+    deleted go too. Only scans with reports in the store are looked up.
+    
+    Returns:
+        Number of scans whose raw output was deleted
+    """
+    # scan_date is a naive timestamp holding UTC
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=settings.raw_output_retention_days)
+    scan_ids = stored_scan_ids()
+    purged = 0
+    
+    with SyncSessionLocal() as db:
+        for i in range(0, len(scan_ids), PURGE_BATCH_SIZE):
+            batch = scan_ids[i:i + PURGE_BATCH_SIZE]
+            kept = set(db.execute(
+                select(ScanResult.scan_id)
+                .where(ScanResult.scan_id.in_(batch), ScanResult.scan_date >= cutoff)
+            ).scalars())
+            expired = [scan_id for scan_id in batch if scan_id not in kept]
+            if not expired:
+                continue
+            
+            # Pointers are cleared first, so none is left pointing at a
+            # deleted report
+            db.execute(
+                update(ScanResult)
+                .where(ScanResult.scan_id.in_(expired))
+                .values(raw_output={})
+            )
+            db.commit()
+            for scan_id in expired:
+                delete_raw_output(scan_id)
+            purged += len(expired)
+    
+    logger.info("Purged raw output of %s scans", purged)
+    return purged
@@ -1,22 +1,11 @@
-from celery import Task
+from src.workers.base import ScanTaskBase
 from src.workers.celery_app import celery_app
 from src.integrations.scanning_tools.zap import ZAPScanner
-from src.db.session import get_db
-from src.db.postgres.models import ScanResults
 from src.core.logging import get_logger
 
 logger = get_logger(__name__)
 
-class DASTScanTask(Task):
-    _db = None
-    
-    @property
-    def db(self):
-        if self._db is None:
-            self._db = next(get_db())
-        return self._db
-
-@celery_app.task(bind=True, base=DASTScanTask)
+@celery_app.task(bind=True, base=ScanTaskBase)
 def run_dast_scan(self, scan_id: str, repository_url: str) -> dict:
     """
     Runs dynamic application security testing using OWASP ZAP.
@@ -36,6 +25,9 @@ def run_dast_scan(self, scan_id: str, repository_url: str) -> dict:
         
         # Run ZAP scan
         zap_results = zap_scanner.scan_application(repository_url)
+        # The raw report only goes to the report store, never into findings
+        # or the task result
+        raw_output = zap_results.pop("raw_output", None)
         
         # Process results
         processed_results = {
@@ -43,18 +35,7 @@ def run_dast_scan(self, scan_id: str, repository_url: str) -> dict:
             "total_issues": len(zap_results.get("issues", []))
         }
         
-        # Update scan results in database
-        scan_result = self.db.query(ScanResults).filter(
-            ScanResults.scan_id == scan_id
-        ).first()
-        
-        if scan_result:
-            current_findings = scan_result.findings or {}
-            current_findings["dast"] = processed_results
-            scan_result.findings = current_findings
-            scan_result.raw_output["dast"] = zap_results.get("raw_output")
-            
-            self.db.commit()
+        self.finalize(scan_id, "dast", processed_results, raw_output)
             
         logger.info(f"DAST scan completed for {repository_url}")
         return processed_results
@@ -62,7 +43,3 @@ def run_dast_scan(self, scan_id: str, repository_url: str) -> dict:
     except Exception as e:
         logger.error(f"DAST scan failed: {str(e)}")
         raise
-        
-    finally:
-        if self._db:
-            self._db.close()
@@ -1,23 +1,22 @@
-from celery import Task
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List
+from celery.exceptions import SoftTimeLimitExceeded
+from sqlalchemy import delete, insert, select
+from src.workers.base import ScanTaskBase
 from src.workers.celery_app import celery_app
 from src.integrations.scanning_tools.bandit import BanditScanner
 from src.integrations.scanning_tools.semgrep import SemgrepScanner
-from src.db.session import get_db
-from src.db.postgres.models import ScanResult
+from src.services.workspace.ephemeral_workspace import workspace_root
+from src.services.workspace.git_service import GitService
+from src.db.postgres.models import ScanFinding, ScanResult
+from src.services.scanning.rules_manager import RulesManager
+from src.services.scanning.vulnerability_mapper import VulnerabilityMapper
 from src.core.logging import get_logger
 
 logger = get_logger(__name__)
 
-class SASTScanTask(Task):
-    _db = None
-    
-    @property
-    def db(self):
-        if self._db is None:
-            self._db = next(get_db())
-        return self._db
-
-@celery_app.task(bind=True, base=SASTScanTask)
+@celery_app.task(bind=True, base=ScanTaskBase)
 def run_sast_scan(self, scan_id: str, repository_url: str, branch: str) -> dict:
     """
     Runs static application security testing using multiple tools.
@@ -30,113 +29,143 @@ def run_sast_scan(self, scan_id: str, repository_url: str, branch: str) -> dict:
     Returns:
         Dict containing scan results
     """
-    logger.info(f"Starting SAST scan for {repository_url}:{branch}")
+    logger.info("Starting SAST scan for %s:%s", repository_url, branch)
     
     try:
-        # Get scan configuration
-        scan_result = self.db.query(ScanResult).filter(
-            ScanResult.scan_id == scan_id
-        ).first()
+        # Get scan configuration; only the framework is needed, so the
+        # findings and raw_output blobs are not loaded here
+        framework_id = self.db.execute(
+            select(ScanResult.framework_id).where(ScanResult.scan_id == scan_id)
+        ).scalar_one_or_none()
         
-        if not scan_result:
+        if framework_id is None:
             raise ValueError(f"Scan {scan_id} not found")
             
         # Load framework-specific rules
-        from src.services.scanning.rules_manager import RulesManager
         rules_manager = RulesManager(self.db)
-        framework_rules = rules_manager.get_framework_rules(scan_result.framework_id)
+        framework_rules = rules_manager.get_framework_rules(framework_id)
         
         # Initialize scanners
         bandit_scanner = BanditScanner()
         semgrep_scanner = SemgrepScanner()
         
-        # Run Bandit scan with framework rules
-        bandit_results = bandit_scanner.scan_repository(
-            repository_url=repository_url,
-            branch=branch,
-            custom_rules=framework_rules["bandit"]
-        )
-        
-        # Run Semgrep scan with framework rules
-        semgrep_results = semgrep_scanner.scan_repository(
-            repository_url=repository_url,
-            branch=branch,
-            rules=framework_rules["semgrep"]
-        )
-        
         # Map findings to known vulnerabilities
-        from src.services.scanning.vulnerability_mapper import VulnerabilityMapper
         mapper = VulnerabilityMapper(self.db)
         
-        mapped_findings = []
+        # Check out once and point both scanners at the same tree; neither
+        # writes into it
+        with tempfile.TemporaryDirectory(dir=workspace_root()) as checkout_dir:
+            logger.info("Checking out %s:%s to %s", repository_url, branch, checkout_dir)
+            GitService().checkout(repository_url, branch, checkout_dir)
+            
+            # Run Bandit and Semgrep with framework rules side by side; both
+            # mostly wait on their scanner processes. The raw reports are
+            # requested for the report store only and popped off below
+            executor = ThreadPoolExecutor(max_workers=2)
+            try:
+                futures = {
+                    executor.submit(
+                        bandit_scanner.scan_path,
+                        checkout_dir,
+                        custom_rules=framework_rules["bandit"],
+                        include_raw=True
+                    ): ("bandit", mapper.map_bandit_findings),
+                    executor.submit(
+                        semgrep_scanner.scan_path,
+                        checkout_dir,
+                        rules=framework_rules["semgrep"],
+                        include_raw=True
+                    ): ("semgrep", mapper.map_semgrep_findings)
+                }
+                
+                # Map each tool's findings as soon as its scan finishes, while
+                # the other scanner is still running. The mapper's session is
+                # only ever used from this thread
+                results: Dict[str, Dict[str, Any]] = {}
+                raw_outputs: Dict[str, Any] = {}
+                tool_matches: Dict[str, List[List[Dict[str, Any]]]] = {}
+                for future in as_completed(futures):
+                    tool, map_findings = futures[future]
+                    results[tool] = future.result()
+                    # The raw report goes to the report store, never into
+                    # combined_results
+                    raw_outputs[tool] = results[tool].pop("raw_output", None)
+                    tool_matches[tool] = map_findings(results[tool].get("issues", []))
+            except SoftTimeLimitExceeded:
+                logger.warning("SAST scan %s hit its soft time limit, stopping scanners", scan_id)
+                semgrep_scanner.terminate()
+                raise
+            except Exception:
+                semgrep_scanner.terminate()
+                raise
+            finally:
+                # Never wait on a scanner that is still running: the checkout
+                # is removed right away, well before the hard time limit would
+                # kill this process and leave it behind. In-process Bandit
+                # cannot be stopped; it runs out on the removed tree and its
+                # result is dropped
+                executor.shutdown(wait=False, cancel_futures=True)
         
-        # Map Bandit findings
-        for finding in bandit_results.get("issues", []):
-            matches = mapper.map_bandit_finding(finding)
-            if matches:
-                mapped_findings.append({
-                    "tool": "bandit",
-                    "finding": finding,
-                    "matches": matches,
-                    "controls": [
-                        control
-                        for match in matches
-                        for control in mapper.map_to_controls(match["vulnerability_id"])
-                    ]
-                })
+        bandit_results = results["bandit"]
+        semgrep_results = results["semgrep"]
+        bandit_issues = bandit_results.get("issues", [])
+        semgrep_issues = semgrep_results.get("issues", [])
+        
+        # One lookup for the controls of every matched vulnerability
+        controls = mapper.map_to_controls_bulk(
+            match["vulnerability_id"]
+            for matches in (*tool_matches["bandit"], *tool_matches["semgrep"])
+            for match in matches
+        )
         
-        # Map Semgrep findings
-        for finding in semgrep_results.get("issues", []):
-            matches = mapper.map_semgrep_finding(finding)
-            if matches:
-                mapped_findings.append({
-                    "tool": "semgrep",
+        # One row per matched finding, queryable across scans instead of
+        # buried in the findings JSON
+        finding_rows = []
+        high_confidence = 0
+        for tool, findings in (("bandit", bandit_issues), ("semgrep", semgrep_issues)):
+            for finding, matches in zip(findings, tool_matches[tool]):
+                if not matches:
+                    continue
+                if any(match["confidence"] > 0.8 for match in matches):
+                    high_confidence += 1
+                finding_controls = [
+                    control
+                    for match in matches
+                    for control in controls[match["vulnerability_id"]]
+                ]
+                finding_rows.append({
+                    "scan_id": scan_id,
+                    "tool": tool,
                     "finding": finding,
                     "matches": matches,
-                    "controls": [
-                        control
-                        for match in matches
-                        for control in mapper.map_to_controls(match["vulnerability_id"])
-                    ]
+                    "controls": finding_controls,
+                    "vulnerability_ids": [match["vulnerability_id"] for match in matches],
+                    "control_ids": sorted({control["control_id"] for control in finding_controls})
                 })
         
-        # Combine results
+        # Combine results; the mapped findings themselves are only in
+        # scan_findings, and the results endpoint reads them back from there
         combined_results = {
             "bandit": bandit_results,
             "semgrep": semgrep_results,
-            "total_issues": len(bandit_results.get("issues", [])) + 
-                          len(semgrep_results.get("issues", [])),
-            "mapped_findings": mapped_findings,
+            "total_issues": len(bandit_issues) + len(semgrep_issues),
             "framework_matches": {
-                "total_mapped": len(mapped_findings),
-                "high_confidence": len([f for f in mapped_findings 
-                    if any(m["confidence"] > 0.8 for m in f["matches"])])
+                "total_mapped": len(finding_rows),
+                "high_confidence": high_confidence
             }
         }
         
-        # Update scan results in database
-        scan_result = self.db.query(ScanResult).filter(
-            ScanResult.scan_id == scan_id
-        ).first()
+        # Sent as multi-row INSERTs in pages, committed with the results
+        # below. Rows of an earlier, redelivered run are replaced
+        self.db.execute(delete(ScanFinding).where(ScanFinding.scan_id == scan_id))
+        if finding_rows:
+            self.db.execute(insert(ScanFinding), finding_rows)
         
-        if scan_result:
-            current_findings = scan_result.findings or {}
-            current_findings["sast"] = combined_results
-            scan_result.findings = current_findings
-            scan_result.raw_output["sast"] = {
-                "bandit": bandit_results.get("raw_output"),
-                "semgrep": semgrep_results.get("raw_output")
-            }
-            
-            self.db.commit()
+        self.finalize(scan_id, "sast", combined_results, raw_outputs)
             
-        logger.info(f"SAST scan completed for {repository_url}:{branch}")
+        logger.info("SAST scan completed for %s:%s", repository_url, branch)
         return combined_results
         
     except Exception as e:
-        logger.error(f"SAST scan failed: {str(e)}")
+        logger.error("SAST scan failed: %s", e)
         raise
-        
-    finally:
-        if self._db:
-            self._db.close()
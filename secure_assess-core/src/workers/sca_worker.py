@@ -1,22 +1,12 @@
-from celery import Task
+from collections import Counter
+from src.workers.base import ScanTaskBase
 from src.workers.celery_app import celery_app
 from src.integrations.scanning_tools.dependency_check import DependencyCheck
-from src.db.session import get_db
-from src.db.postgres.models import ScanResults
 from src.core.logging import get_logger
 
 logger = get_logger(__name__)
 
-class SCAScanTask(Task):
-    _db = None
-    
-    @property
-    def db(self):
-        if self._db is None:
-            self._db = next(get_db())
-        return self._db
-
-@celery_app.task(bind=True, base=SCAScanTask)
+@celery_app.task(bind=True, base=ScanTaskBase)
 def run_sca_scan(self, scan_id: str, repository_url: str, branch: str) -> dict:
     """
     Runs software composition analysis using OWASP Dependency Check.
@@ -29,7 +19,7 @@ def run_sca_scan(self, scan_id: str, repository_url: str, branch: str) -> dict:
     Returns:
         Dict containing scan results
     """
-    logger.info(f"Starting SCA scan for {repository_url}:{branch}")
+    logger.info("Starting SCA scan for %s:%s", repository_url, branch)
     
     try:
         # Initialize dependency checker
@@ -40,37 +30,26 @@ def run_sca_scan(self, scan_id: str, repository_url: str, branch: str) -> dict:
             repository_url=repository_url,
             branch=branch
         )
+        # The raw report only goes to the report store, never into findings
+        # or the task result
+        raw_output = dep_results.pop("raw_output", None)
         
-        # Process results
+        # Process results, counting every severity in one pass
+        severity_counts = Counter(
+            v.get("severity", "").lower() for v in dep_results.get("vulnerabilities", [])
+        )
         processed_results = {
             "dependency_check": dep_results,
-            "total_vulnerabilities": len(dep_results.get("vulnerabilities", [])),
-            "critical_vulnerabilities": len([
-                v for v in dep_results.get("vulnerabilities", [])
-                if v.get("severity", "").lower() == "critical"
-            ])
+            "total_vulnerabilities": sum(severity_counts.values()),
+            "critical_vulnerabilities": severity_counts["critical"],
+            "severity_histogram": dict(severity_counts)
         }
         
-        # Update scan results in database
-        scan_result = self.db.query(ScanResults).filter(
-            ScanResults.scan_id == scan_id
-        ).first()
-        
-        if scan_result:
-            current_findings = scan_result.findings or {}
-            current_findings["sca"] = processed_results
-            scan_result.findings = current_findings
-            scan_result.raw_output["sca"] = dep_results.get("raw_output")
-            
-            self.db.commit()
+        self.finalize(scan_id, "sca", processed_results, raw_output)
             
-        logger.info(f"SCA scan completed for {repository_url}:{branch}")
+        logger.info("SCA scan completed for %s:%s", repository_url, branch)
         return processed_results
         
     except Exception as e:
-        logger.error(f"SCA scan failed: {str(e)}")
+        logger.error("SCA scan failed: %s", e)
         raise
-        
-    finally:
-        if self._db:
-            self._db.close()
@@ -0,0 +1,90 @@
+"""
+Compliance scoring in Postgres, against findings shaped as the scan tasks store them.
+"""
+
+import os
+
+import orjson
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.services.scanning.scoring import AGGREGATE_SCORE_SQL
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+# What finalize leaves in scan_results.findings after SAST and SCA ran
+FINDINGS = {
+    "sast": {
+        "bandit": {
+            "issues": [
+                {"severity": "HIGH", "confidence": "HIGH", "type": "hardcoded_sql_expressions", "file": "app/db.py", "line": 12},
+                {"severity": "LOW", "confidence": "HIGH", "type": "assert_used", "file": "app/util.py", "line": 3},
+            ],
+            "metrics": {"total_files": 2, "total_lines": 120, "high_severity": 1, "medium_severity": 0, "low_severity": 1},
+        },
+        "semgrep": {
+            "issues": [
+                {"severity": "ERROR", "confidence": "high", "type": "python.lang.security.audit.eval", "file": "app/views.py", "line": 40},
+            ],
+            "metrics": {"total_files": 3, "total_lines": 1, "high_severity": 1, "medium_severity": 0, "low_severity": 0},
+        },
+        "total_issues": 3,
+        "framework_matches": {"total_mapped": 1, "high_confidence": 0},
+    },
+    "sca": {
+        "dependency_check": {
+            "vulnerabilities": [
+                {"severity": "CRITICAL", "package": "requests", "cve_id": "CVE-2023-32681"},
+            ],
+        },
+        "total_vulnerabilities": 1,
+        "critical_vulnerabilities": 1,
+        "severity_histogram": {"critical": 1},
+    },
+}
+
+
+@pytest.fixture
+def connection():
+    engine = create_engine(TEST_DATABASE_URL)
+    with engine.connect() as conn:
+        conn.begin()
+        # Shadows any real scan_results for this transaction only
+        conn.execute(text("""
+            CREATE TEMP TABLE scan_results (
+                scan_id varchar(50),
+                status varchar(20),
+                findings jsonb,
+                compliance_score float
+            ) ON COMMIT DROP
+        """))
+        yield conn
+        conn.rollback()
+    engine.dispose()
+
+
+def _score(connection, findings, status="complete"):
+    connection.execute(
+        text("INSERT INTO scan_results (scan_id, status, findings) VALUES ('scan-1', :status, CAST(:findings AS jsonb))"),
+        {"status": status, "findings": None if findings is None else orjson.dumps(findings).decode()}
+    )
+    return connection.execute(AGGREGATE_SCORE_SQL, {"scan_id": "scan-1"}).scalar_one_or_none()
+
+
+def test_scores_issues_and_vulnerabilities_of_every_tool(connection):
+    # high 0.8 + low 0.2 + unknown 0.1 + critical 1.0 over 4 findings
+    assert _score(connection, FINDINGS) == pytest.approx(47.5)
+
+
+def test_scan_without_findings_scores_100(connection):
+    assert _score(connection, {"sast": {"bandit": {"issues": []}, "total_issues": 0}}) == 100
+
+
+def test_scan_without_findings_document_scores_100(connection):
+    assert _score(connection, None) == 100
+
+
+def test_incomplete_scan_is_not_scored(connection):
+    assert _score(connection, FINDINGS, status="in_progress") is None
@@ -0,0 +1,70 @@
+"""
+Purging stored raw output of expired and deleted scans.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import orjson
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from src.config import settings
+from src.services.scanning.raw_output_store import store_raw_output, stored_scan_ids
+from src.workers import cleanup_worker
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+
+@pytest.fixture
+def connection(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "raw_output_dir", str(tmp_path))
+    engine = create_engine(TEST_DATABASE_URL)
+    with engine.connect() as conn:
+        conn.begin()
+        # Shadows any real scan_results for this transaction only
+        conn.execute(text("""
+            CREATE TEMP TABLE scan_results (
+                scan_id varchar(50),
+                scan_date timestamp,
+                raw_output jsonb
+            ) ON COMMIT DROP
+        """))
+        monkeypatch.setattr(cleanup_worker, "SyncSessionLocal", sessionmaker(bind=conn))
+        yield conn
+        conn.rollback()
+    engine.dispose()
+
+
+def _add_scan(connection, scan_id, age_days):
+    pointer = store_raw_output(scan_id, "sast", {"results": []})
+    connection.execute(
+        text("INSERT INTO scan_results VALUES (:scan_id, :scan_date, CAST(:raw_output AS jsonb))"),
+        {
+            "scan_id": scan_id,
+            "scan_date": datetime.utcnow() - timedelta(days=age_days),
+            "raw_output": orjson.dumps({"sast": pointer}).decode()
+        }
+    )
+
+
+def test_purges_expired_and_deleted_scans(connection, monkeypatch):
+    monkeypatch.setattr(settings, "raw_output_retention_days", 30)
+    _add_scan(connection, "recent", age_days=1)
+    _add_scan(connection, "expired", age_days=31)
+    # Reports of a scan whose record is gone
+    store_raw_output("deleted", "sast", {"results": []})
+
+    assert cleanup_worker.purge_raw_output() == 2
+
+    assert stored_scan_ids() == ["recent"]
+    pointers = dict(connection.execute(text("SELECT scan_id, raw_output FROM scan_results")).all())
+    assert pointers["recent"]["sast"]["path"] == "recent/sast.json.gz"
+    assert pointers["expired"] == {}
+
+
+def test_nothing_to_purge(connection):
+    assert cleanup_worker.purge_raw_output() == 0
@@ -0,0 +1,58 @@
+"""
+Tests for in-process Bandit scans and their sharding.
+"""
+
+import pytest
+
+from src.config import settings
+from src.integrations.scanning_tools import bandit
+from src.integrations.scanning_tools.bandit import BanditScanner
+
+
+@pytest.fixture
+def checkout(tmp_path):
+    for i in range(4):
+        (tmp_path / "pkg").mkdir(exist_ok=True)
+        (tmp_path / "pkg" / f"module_{i}.py").write_text(
+            "import subprocess\n"
+            f"subprocess.call('ls {i}', shell=True)\n"
+            "assert True\n"
+        )
+    return tmp_path
+
+
+def _scan(path, include_raw=False):
+    report = BanditScanner().scan_path(str(path), include_raw=include_raw)
+    report["issues"].sort(key=lambda issue: (issue["file"], issue["line"], issue["type"]))
+    return report
+
+
+def test_paths_are_relative_and_raw_output_is_opt_in(checkout):
+    report = _scan(checkout)
+
+    assert "raw_output" not in report
+    assert {issue["file"] for issue in report["issues"]} == {f"pkg/module_{i}.py" for i in range(4)}
+    assert "raw_output" in _scan(checkout, include_raw=True)
+
+
+def test_runs_in_process_by_default(checkout, monkeypatch):
+    monkeypatch.setattr(bandit, "MIN_FILES_PER_SHARD", 1)
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("Bandit started a process pool")
+
+    monkeypatch.setattr(bandit, "ProcessPoolExecutor", no_pool)
+
+    assert settings.bandit_workers == 1
+    assert _scan(checkout)["issues"]
+
+
+def test_sharded_scan_matches_single_process(checkout, monkeypatch):
+    single = _scan(checkout)
+
+    monkeypatch.setattr(bandit, "MIN_FILES_PER_SHARD", 1)
+    monkeypatch.setattr(settings, "bandit_workers", 2)
+    sharded = _scan(checkout)
+
+    assert sharded["issues"] == single["issues"]
+    assert sharded["metrics"] == single["metrics"]
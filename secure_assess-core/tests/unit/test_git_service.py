@@ -0,0 +1,61 @@
+"""
+Tests for checkouts through the bare mirror cache.
+"""
+
+from pathlib import Path
+
+import pytest
+from git import Repo
+
+from src.services.workspace.git_service import GitService
+
+
+@pytest.fixture
+def origin(tmp_path):
+    repo = Repo.init(tmp_path / "origin", initial_branch="main")
+    with repo.config_writer() as config:
+        config.set_value("user", "name", "Test")
+        config.set_value("user", "email", "test@example.com")
+    _commit(repo, "app.py", "print('v1')\n")
+    return repo
+
+
+def _commit(repo, name, content):
+    Path(repo.working_tree_dir, name).write_text(content)
+    repo.index.add([name])
+    repo.index.commit(f"Update {name}")
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    # Route the local origin through the mirror, as a remote URL would be
+    monkeypatch.setattr(GitService, "_local_path", staticmethod(lambda url: None))
+    return GitService(cache_dir=str(tmp_path / "cache"))
+
+
+def test_checkout_through_mirror(origin, service, tmp_path):
+    target = tmp_path / "scan-1"
+    service.checkout(origin.working_tree_dir, "main", str(target))
+
+    assert (target / "app.py").read_text() == "print('v1')\n"
+    mirrors = list((tmp_path / "cache").iterdir())
+    assert len(mirrors) == 1 and Repo(mirrors[0]).bare
+
+
+def test_rescan_fetches_new_commits(origin, service, tmp_path):
+    service.checkout(origin.working_tree_dir, "main", str(tmp_path / "scan-1"))
+    _commit(origin, "app.py", "print('v2')\n")
+
+    target = tmp_path / "scan-2"
+    service.checkout(origin.working_tree_dir, "main", str(target))
+
+    assert (target / "app.py").read_text() == "print('v2')\n"
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+
+
+def test_local_repository_is_cloned_without_mirror(origin, tmp_path):
+    target = tmp_path / "scan-1"
+    GitService(cache_dir=str(tmp_path / "cache")).checkout(origin.working_tree_dir, "main", str(target))
+
+    assert (target / "app.py").read_text() == "print('v1')\n"
+    assert not list((tmp_path / "cache").iterdir())
@@ -0,0 +1,78 @@
+"""
+Tests for the compressed raw scanner output store.
+"""
+
+import pytest
+
+from src.config import settings
+from src.services.scanning.raw_output_store import (
+    delete_raw_output,
+    load_raw_output,
+    load_raw_outputs,
+    store_raw_output,
+    stored_scan_ids
+)
+
+REPORT = {"results": [{"check_id": "python.lang.security.audit.eval", "path": "app.py"}], "errors": []}
+
+
+@pytest.fixture(autouse=True)
+def raw_output_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "raw_output_dir", str(tmp_path))
+    return tmp_path
+
+
+def test_round_trip(raw_output_dir):
+    pointer = store_raw_output("scan-1", "sast", {"semgrep": REPORT, "bandit": None})
+
+    # Relative, so readers can mount the store elsewhere
+    assert pointer["path"] == "scan-1/sast.json.gz"
+    assert pointer["bytes"] == (raw_output_dir / "scan-1" / "sast.json.gz").stat().st_size
+    assert load_raw_output(pointer) == {"semgrep": REPORT, "bandit": None}
+    # No temp file left behind
+    assert [p.name for p in (raw_output_dir / "scan-1").iterdir()] == ["sast.json.gz"]
+
+
+def test_nothing_stored_without_output(raw_output_dir):
+    assert store_raw_output("scan-1", "sca", None) is None
+    assert not (raw_output_dir / "scan-1").exists()
+
+
+def test_load_rejects_modified_report():
+    pointer = store_raw_output("scan-1", "sast", REPORT)
+
+    with pytest.raises(ValueError):
+        load_raw_output({**pointer, "sha256": "0" * 64})
+
+
+def test_pointers_survive_mounting_the_store_elsewhere(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "raw_output_dir", str(tmp_path / "worker"))
+    pointer = store_raw_output("scan-1", "sast", REPORT)
+
+    (tmp_path / "worker").rename(tmp_path / "api")
+    monkeypatch.setattr(settings, "raw_output_dir", str(tmp_path / "api"))
+
+    assert load_raw_output(pointer) == REPORT
+
+
+def test_load_all_of_a_scan(raw_output_dir):
+    pointers = {
+        "sast": store_raw_output("scan-1", "sast", REPORT),
+        "sca": store_raw_output("scan-1", "sca", {"dependencies": []}),
+        "dast": None
+    }
+    (raw_output_dir / "scan-1" / "sca.json.gz").unlink()
+
+    # A purged report reads as no output rather than failing the request
+    assert load_raw_outputs(pointers) == {"sast": REPORT, "sca": None, "dast": None}
+    assert load_raw_outputs(None) == {}
+
+
+def test_delete(raw_output_dir):
+    store_raw_output("scan-1", "sast", REPORT)
+    store_raw_output("scan-2", "sast", REPORT)
+
+    delete_raw_output("scan-1")
+    delete_raw_output("scan-3")
+
+    assert stored_scan_ids() == ["scan-2"]
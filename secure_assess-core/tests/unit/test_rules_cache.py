@@ -0,0 +1,72 @@
+"""
+Tests for serving framework rules from the Redis cache.
+"""
+
+import asyncio
+
+import orjson
+import pytest
+
+from src.api.v1.endpoints import rules as rules_endpoint
+from src.db.redis.client import rules_key
+
+RULES_V1 = {"bandit": {}, "semgrep": {"rules": []}, "framework_name": "OWASP", "version": "2026-01-01T00:00:00"}
+RULES_V2 = {**RULES_V1, "version": "2026-02-01T00:00:00"}
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+
+class FakeRulesManager:
+    """Serves RULES_V2 as the framework's current rules"""
+    generated = 0
+
+    def __init__(self, db):
+        pass
+
+    async def get_rules_version_async(self, framework_id):
+        return RULES_V2["version"]
+
+    async def get_framework_rules_async(self, framework_id):
+        FakeRulesManager.generated += 1
+        return RULES_V2
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(rules_endpoint, "get_async_redis", lambda: redis)
+    monkeypatch.setattr(rules_endpoint, "RulesManager", FakeRulesManager)
+    FakeRulesManager.generated = 0
+    return redis
+
+
+def test_current_published_rules_are_served(redis):
+    redis.values[rules_key(1)] = orjson.dumps(RULES_V2)
+
+    assert asyncio.run(rules_endpoint._load_rules(1, db=None)) == RULES_V2
+    assert FakeRulesManager.generated == 0
+
+
+def test_stale_published_rules_are_regenerated_and_republished(redis):
+    redis.values[rules_key(1)] = orjson.dumps(RULES_V1)
+
+    assert asyncio.run(rules_endpoint._load_rules(1, db=None)) == RULES_V2
+    assert FakeRulesManager.generated == 1
+    assert orjson.loads(redis.values[rules_key(1)]) == RULES_V2
+
+
+def test_unversioned_published_rules_are_regenerated(redis):
+    # Published before rules carried their version
+    redis.values[rules_key(1)] = orjson.dumps({key: value for key, value in RULES_V1.items() if key != "version"})
+
+    assert asyncio.run(rules_endpoint._load_rules(1, db=None)) == RULES_V2
+    assert FakeRulesManager.generated == 1
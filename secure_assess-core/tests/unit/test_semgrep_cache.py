@@ -0,0 +1,49 @@
+"""
+Tests for the per-blob Semgrep result cache.
+"""
+
+from src.integrations.scanning_tools.semgrep_cache import MAX_PARAMS, SemgrepResultCache
+
+RESULT = {"check_id": "python.lang.security.audit.eval", "start": {"line": 3}, "extra": {"severity": "ERROR"}}
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SemgrepResultCache("rules-1", "1.50.0", path=path)
+    cache.put_many([("sha-a", True, [RESULT]), ("sha-b", True, []), ("sha-c", False, [])])
+    cache.close()
+
+    # A new connection, as the next scan would open
+    cache = SemgrepResultCache("rules-1", "1.50.0", path=path)
+    try:
+        assert cache.get_many({"sha-a", "sha-b", "sha-c", "sha-missing"}) == {
+            "sha-a": (True, [RESULT]),
+            "sha-b": (True, []),
+            "sha-c": (False, [])
+        }
+    finally:
+        cache.close()
+
+
+def test_other_rules_or_version_miss(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = SemgrepResultCache("rules-1", "1.50.0", path=path)
+    cache.put_many([("sha-a", True, [RESULT])])
+    cache.close()
+
+    for rules_hash, version in (("rules-2", "1.50.0"), ("rules-1", "1.51.0")):
+        other = SemgrepResultCache(rules_hash, version, path=path)
+        try:
+            assert other.get_many(["sha-a"]) == {}
+        finally:
+            other.close()
+
+
+def test_lookup_beyond_parameter_limit(tmp_path):
+    cache = SemgrepResultCache("rules-1", "1.50.0", path=str(tmp_path / "cache.db"))
+    try:
+        shas = [f"sha-{i}" for i in range(MAX_PARAMS * 2)]
+        cache.put_many((sha, True, []) for sha in shas)
+        assert set(cache.get_many(shas)) == set(shas)
+    finally:
+        cache.close()
@@ -0,0 +1,103 @@
+"""
+Tests for how incremental Semgrep scans fill and read the result cache.
+"""
+
+import pytest
+
+from src.integrations.scanning_tools.semgrep import SemgrepScanner
+from src.integrations.scanning_tools.semgrep_cache import SemgrepResultCache
+
+
+def _result(path, line):
+    return {"check_id": "python.lang.security.audit.eval", "path": path, "start": {"line": line}, "extra": {"severity": "ERROR"}}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SemgrepResultCache("rules-1", "1.50.0", path=str(tmp_path / "cache.db"))
+    yield cache
+    cache.close()
+
+
+def test_store_caches_every_target_without_its_path(cache):
+    blobs = {"app/views.py": "sha-views", "app/clean.py": "sha-clean", "app/skipped.txt": "sha-skipped"}
+    raw_output = {
+        "results": [_result("app/views.py", 4), _result("app/views.py", 9)],
+        "errors": [],
+        "paths": {"scanned": ["app/views.py", "app/clean.py"]}
+    }
+
+    SemgrepScanner()._store_results(cache, blobs, list(blobs), raw_output)
+
+    cached = cache.get_many(blobs.values())
+    assert cached["sha-views"] == (True, [
+        {key: value for key, value in _result("app/views.py", line).items() if key != "path"}
+        for line in (4, 9)
+    ])
+    # Clean and unscanned files are cached too, so they are not rescanned
+    assert cached["sha-clean"] == (True, [])
+    assert cached["sha-skipped"] == (False, [])
+
+
+def test_store_skips_files_that_errored(cache):
+    blobs = {"app/slow.py": "sha-slow", "app/ok.py": "sha-ok"}
+    raw_output = {
+        "results": [],
+        "errors": [{"path": "app/slow.py", "type": "Timeout"}],
+        "paths": {"scanned": ["app/ok.py"]}
+    }
+
+    SemgrepScanner()._store_results(cache, blobs, list(blobs), raw_output)
+
+    assert set(cache.get_many(blobs.values())) == {"sha-ok"}
+
+
+def test_store_only_caches_targets(cache):
+    blobs = {"app/changed.py": "sha-changed", "app/cached.py": "sha-cached"}
+    raw_output = {"results": [], "errors": [], "paths": {"scanned": ["app/changed.py"]}}
+
+    SemgrepScanner()._store_results(cache, blobs, ["app/changed.py"], raw_output)
+
+    assert set(cache.get_many(blobs.values())) == {"sha-changed"}
+
+
+def test_merge_adds_cached_results_under_current_paths():
+    # app/old.py was renamed to app/new.py, keeping its content
+    blobs = {"app/changed.py": "sha-changed", "app/new.py": "sha-moved", "app/notes.txt": "sha-notes"}
+    cached = {
+        "sha-moved": (True, [{key: value for key, value in _result("app/old.py", 7).items() if key != "path"}]),
+        "sha-notes": (False, [])
+    }
+    raw_output = {"results": [_result("app/changed.py", 2)], "errors": [], "paths": {"scanned": ["app/changed.py"]}}
+
+    SemgrepScanner()._merge_cached(blobs, cached, raw_output)
+
+    assert raw_output["results"] == [_result("app/changed.py", 2), _result("app/new.py", 7)]
+    # Cached files Semgrep skipped stay out of the scanned count
+    assert raw_output["paths"]["scanned"] == ["app/changed.py", "app/new.py"]
+
+
+def test_merge_into_skipped_run():
+    blobs = {"app/views.py": "sha-views"}
+    cached = {"sha-views": (True, [])}
+    raw_output = {"results": [], "errors": [], "paths": {"scanned": []}}
+
+    SemgrepScanner()._merge_cached(blobs, cached, raw_output)
+
+    assert raw_output == {"results": [], "errors": [], "paths": {"scanned": ["app/views.py"]}}
+
+
+def test_store_then_merge_reproduces_full_scan(cache):
+    blobs = {"app/views.py": "sha-views", "app/clean.py": "sha-clean"}
+    full_scan = {
+        "results": [_result("app/views.py", 4)],
+        "errors": [],
+        "paths": {"scanned": ["app/views.py", "app/clean.py"]}
+    }
+    SemgrepScanner()._store_results(cache, blobs, list(blobs), full_scan)
+
+    # Nothing changed, so the next scan is served from the cache alone
+    rescan = {"results": [], "errors": [], "paths": {"scanned": []}}
+    SemgrepScanner()._merge_cached(blobs, cache.get_many(blobs.values()), rescan)
+
+    assert rescan == full_scan
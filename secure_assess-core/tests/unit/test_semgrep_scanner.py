@@ -0,0 +1,101 @@
+"""
+Tests for running Semgrep: stopping runs that outlast their time, and
+writing rule files for concurrent scans.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
+import pytest
+
+from src.config import Settings, settings
+from src.integrations.scanning_tools.semgrep import SemgrepScanner, _rules_file, _rules_hash
+
+
+@pytest.fixture
+def hanging_semgrep(tmp_path, monkeypatch):
+    """A semgrep on PATH that never finishes, with a child of its own like semgrep-core"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    pid_file = tmp_path / "child.pid"
+    semgrep = bin_dir / "semgrep"
+    semgrep.write_text(f"#!/bin/sh\nsleep 60 &\necho $! > {pid_file}\nwait\n")
+    semgrep.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    return pid_file
+
+
+def _wait_for(pid_file):
+    for _ in range(100):
+        if pid_file.exists() and pid_file.read_text().strip():
+            return int(pid_file.read_text())
+        time.sleep(0.05)
+    raise AssertionError("semgrep did not start")
+
+
+def _gone(pid):
+    # The child was reparented to init or reaped; either way it must not run
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split()[2] == "Z"
+    except FileNotFoundError:
+        return True
+
+
+def test_timeout_kills_semgrep_and_its_children(hanging_semgrep, tmp_path, monkeypatch):
+    monkeypatch.setattr(Settings, "scanner_timeout_seconds", property(lambda self: 1))
+
+    with pytest.raises(RuntimeError, match="timed out"):
+        SemgrepScanner().scan_path(str(tmp_path))
+
+    child = _wait_for(hanging_semgrep)
+    time.sleep(0.2)
+    assert _gone(child)
+
+
+def test_terminate_from_another_thread(hanging_semgrep, tmp_path):
+    scanner = SemgrepScanner()
+    errors = []
+
+    def scan():
+        try:
+            scanner.scan_path(str(tmp_path))
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=scan)
+    thread.start()
+    child = _wait_for(hanging_semgrep)
+    scanner.terminate()
+    thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert errors and "exit code -9" in str(errors[0])
+    time.sleep(0.2)
+    assert _gone(child)
+
+
+def test_terminated_scanner_does_not_start_semgrep(hanging_semgrep, tmp_path):
+    scanner = SemgrepScanner()
+    scanner.terminate()
+
+    with pytest.raises(RuntimeError, match="terminated"):
+        scanner.scan_path(str(tmp_path))
+    assert not hanging_semgrep.exists()
+
+
+def test_rules_file_written_concurrently(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "semgrep_rules_dir", str(tmp_path))
+    rules = {"rules": [{"id": "eval", "pattern": "eval(...)", "message": "eval", "severity": "ERROR"}]}
+    rules_hash = _rules_hash(rules)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        paths = set(executor.map(lambda _: _rules_file(rules, rules_hash), range(32)))
+
+    assert paths == {str(tmp_path / f"{rules_hash}.yaml")}
+    assert orjson.loads((tmp_path / f"{rules_hash}.yaml").read_bytes()) == rules
+    # No temp file left behind
+    assert [p.name for p in tmp_path.iterdir()] == [f"{rules_hash}.yaml"]
@@ -0,0 +1,92 @@
+"""
+Tests for archive extraction of uploaded code.
+"""
+
+import io
+import tarfile
+import zipfile
+
+import pytest
+from fastapi import HTTPException
+
+from src.services.scanning.upload_handler import CodeUploadHandler
+
+
+def _zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return zipfile.ZipFile(buffer)
+
+
+def _tar(*members):
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for info, data in members:
+            archive.addfile(info, io.BytesIO(data) if data is not None else None)
+    buffer.seek(0)
+    # Streamed, as uploads are read
+    return tarfile.open(fileobj=buffer, mode="r|*")
+
+
+def _file(name, data=b"print('hello')\n"):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    return info, data
+
+
+@pytest.fixture
+def extract_dir(tmp_path):
+    path = tmp_path / "upload" / "code"
+    path.mkdir(parents=True)
+    return path
+
+
+def test_zip_extracts_members(extract_dir):
+    with _zip({"app/main.py": "print('hello')\n", "README.md": "docs\n"}) as archive:
+        CodeUploadHandler()._extract_zip(archive, extract_dir)
+
+    assert (extract_dir / "app" / "main.py").read_text() == "print('hello')\n"
+    assert (extract_dir / "README.md").read_text() == "docs\n"
+
+
+@pytest.mark.parametrize("name", ["../evil.py", "app/../../evil.py", "/tmp/evil.py"])
+def test_zip_rejects_traversal(extract_dir, name):
+    with _zip({"app/main.py": "ok\n", name: "evil\n"}) as archive:
+        with pytest.raises(HTTPException) as excinfo:
+            CodeUploadHandler()._extract_zip(archive, extract_dir)
+
+    assert excinfo.value.status_code == 400
+    assert not (extract_dir.parent / "evil.py").exists()
+
+
+def test_tar_extracts_members(extract_dir):
+    with _tar(_file("app/main.py")) as archive:
+        CodeUploadHandler()._extract_tar(archive, extract_dir)
+
+    assert (extract_dir / "app" / "main.py").read_bytes() == b"print('hello')\n"
+
+
+@pytest.mark.parametrize("name", ["../evil.py", "app/../../evil.py", "/tmp/evil.py"])
+def test_tar_rejects_traversal(extract_dir, name):
+    with _tar(_file(name)) as archive:
+        with pytest.raises(HTTPException) as excinfo:
+            CodeUploadHandler()._extract_tar(archive, extract_dir)
+
+    assert excinfo.value.status_code == 400
+    assert not (extract_dir.parent / "evil.py").exists()
+
+
+@pytest.mark.parametrize("link_type", [tarfile.SYMTYPE, tarfile.LNKTYPE])
+def test_tar_rejects_links(extract_dir, link_type):
+    link = tarfile.TarInfo("app/passwd")
+    link.type = link_type
+    link.linkname = "/etc/passwd"
+
+    with _tar((link, None)) as archive:
+        with pytest.raises(HTTPException):
+            CodeUploadHandler()._extract_tar(archive, extract_dir)
+
+    assert not (extract_dir / "app" / "passwd").exists()
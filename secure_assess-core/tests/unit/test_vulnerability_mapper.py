@@ -0,0 +1,81 @@
+"""
+Tests for the batched candidate lookup of VulnerabilityMapper.
+"""
+
+from types import SimpleNamespace
+
+from src.services.scanning import vulnerability_mapper
+from src.services.scanning.vulnerability_mapper import VulnerabilityMapper
+
+
+class RecordingSession:
+    """Returns canned rows for each query and records the statements"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        rows = self.results.pop(0)
+        return SimpleNamespace(all=lambda: rows)
+
+
+def _vulnerability(vulnerability_id):
+    return SimpleNamespace(id=vulnerability_id)
+
+
+def test_candidates_are_split_per_key():
+    sql, command, crypto = _vulnerability(1), _vulnerability(2), _vulnerability(3)
+    keys = [("SQL injection", "SQL injection"), ("Command injection", "Command injection"), ("eval", "eval")]
+    # One flag per key, in the order the keys were first seen
+    db = RecordingSession([
+        (sql, True, False, False),
+        (command, False, True, False),
+        (crypto, True, True, False),
+    ])
+
+    mapper = VulnerabilityMapper(db)
+    mapper._prefetch_candidates(keys)
+
+    assert len(db.statements) == 1
+    assert mapper._candidates == {
+        keys[0]: [sql, crypto],
+        keys[1]: [command, crypto],
+        keys[2]: []
+    }
+
+
+def test_repeated_and_cached_keys_are_not_queried_again():
+    key = ("SQL injection", "SQL injection")
+    db = RecordingSession([(_vulnerability(1), True)])
+
+    mapper = VulnerabilityMapper(db)
+    mapper._prefetch_candidates([key, key])
+    mapper._prefetch_candidates([key])
+
+    assert len(db.statements) == 1
+    assert [v.id for v in mapper._candidates[key]] == [1]
+
+
+def test_keys_are_queried_in_batches(monkeypatch):
+    monkeypatch.setattr(vulnerability_mapper, "SEARCH_BATCH_SIZE", 2)
+    keys = [(f"title {i}", f"description {i}") for i in range(5)]
+    match = _vulnerability(7)
+    db = RecordingSession(
+        [(match, False, True)],
+        [],
+        [(match, True)]
+    )
+
+    mapper = VulnerabilityMapper(db)
+    mapper._prefetch_candidates(keys)
+
+    assert len(db.statements) == 3
+    assert {key: [v.id for v in found] for key, found in mapper._candidates.items()} == {
+        keys[0]: [],
+        keys[1]: [7],
+        keys[2]: [],
+        keys[3]: [],
+        keys[4]: [7]
+    }